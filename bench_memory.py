@@ -0,0 +1,53 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Measures the memory used by both HashMaps with tracemalloc:
+#              bytes per entry once n keys are loaded, and bytes per bucket
+#              of an empty map. Keys and values are created before tracing
+#              starts, so only the map's own structures are counted.
+#              Usage: python bench_memory.py [number of keys]
+
+
+import sys
+import tracemalloc
+
+import hash_map_oa
+import hash_map_sc
+
+
+MAPS = (
+    ("SC", lambda capacity: hash_map_sc.HashMap(capacity, hash)),
+    ("OA", lambda capacity: hash_map_oa.HashMap(capacity, hash)),
+)
+
+
+def traced_bytes(build) -> int:
+    """Returns the bytes still allocated by build() once it returns."""
+    tracemalloc.start()
+    result = build()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def loaded(factory, keys: list, values: list):
+    """Returns a map built by factory holding keys:values."""
+    m = factory(16)
+    for key, value in zip(keys, values):
+        m.put(key, value)
+    return m
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    keys = ['key' + str(i) for i in range(n)]
+    values = list(range(n))
+    print(f"{n} keys")
+    print(f"{'map':>4} {'capacity':>10} {'bytes/entry':>12} {'empty bytes/bucket':>19}")
+    for name, factory in MAPS:
+        m = loaded(factory, keys, values)
+        capacity = m.get_capacity()
+        del m
+        per_entry = traced_bytes(lambda: loaded(factory, keys, values)) / n
+        per_bucket = traced_bytes(lambda: factory(capacity)) / capacity
+        print(f"{name:>4} {capacity:>10} {per_entry:>12.1f} {per_bucket:>19.1f}")
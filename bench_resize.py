@@ -0,0 +1,51 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Compares put() latency percentiles of stop-the-world resizing
+#              against incremental resizing for both HashMaps.
+#              Usage: python bench_resize.py [number of keys] [rehash step]
+
+
+import gc
+import sys
+import time
+
+import hash_map_oa
+import hash_map_sc
+
+
+def put_latencies(m, keys: list) -> list:
+    """Returns the sorted ns taken by each put() of keys into m."""
+    clock = time.perf_counter_ns
+    latencies = []
+    # keep collector pauses out of the resize numbers
+    gc.disable()
+    for key in keys:
+        start = clock()
+        m.put(key, key)
+        latencies.append(clock() - start)
+    gc.enable()
+    latencies.sort()
+    return latencies
+
+
+def percentile(latencies: list, p: float) -> int:
+    """Returns the p-th percentile of sorted latencies."""
+    return latencies[min(int(len(latencies) * p / 100), len(latencies) - 1)]
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    step = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    keys = ['key' + str(i) for i in range(n)]
+    maps = (
+        ("SC stop-the-world", lambda: hash_map_sc.HashMap(16, hash)),
+        ("SC incremental", lambda: hash_map_sc.HashMap(16, hash, rehash_step=step)),
+        ("OA stop-the-world", lambda: hash_map_oa.HashMap(16, hash)),
+        ("OA incremental", lambda: hash_map_oa.HashMap(16, hash, rehash_step=step)),
+    )
+    print(f"{n} puts, rehash step {step}, ns per put")
+    print(f"{'map':>18} {'p50':>8} {'p99':>8} {'p99.9':>10} {'max':>12}")
+    for name, factory in maps:
+        latencies = put_latencies(factory(), keys)
+        print(f"{name:>18} {percentile(latencies, 50):>8} {percentile(latencies, 99):>8} "
+              f"{percentile(latencies, 99.9):>10} {latencies[-1]:>12}")
@@ -0,0 +1,73 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Compares the cold start time of both HashMaps: rebuilding
+#              from the source pairs with put(), unpickling, and loading a
+#              binary snapshot (read at once, streamed in chunks, or
+#              memory-mapped). Also reports each file's size.
+#              Usage: python bench_snapshot.py [number of keys]
+
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+import hash_map_oa
+import hash_map_sc
+
+
+MAPS = (
+    ("SC", hash_map_sc.HashMap, {}),
+    ("OA", hash_map_oa.HashMap, {}),
+)
+
+
+def timed(function) -> (object, float):
+    """Returns function's result and the seconds it took."""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def rebuild(map_class, options: dict, pairs: list):
+    """Returns a map built from pairs with put(), starting small."""
+    m = map_class(16, hash, **options)
+    for key, value in pairs:
+        m.put(key, value)
+    return m
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    pairs = [('key' + str(i), i) for i in range(n)]
+    directory = tempfile.mkdtemp()
+    snapshot = os.path.join(directory, 'map.hms')
+    pickled = os.path.join(directory, 'map.pickle')
+
+    print(f"{n} keys, seconds to a usable map")
+    print(f"{'map':>4} {'put':>7} {'pickle':>7} {'snapshot':>9} {'stream':>8} {'mmap':>7} "
+          f"{'pickle MB':>10} {'snapshot MB':>12}")
+    for name, map_class, options in MAPS:
+        m, put_time = timed(lambda: rebuild(map_class, options, pairs))
+        with open(pickled, 'wb') as file:
+            pickle.dump(m, file, protocol=pickle.HIGHEST_PROTOCOL)
+        m.save(snapshot)
+        expected = dict(m.items())
+
+        def unpickle():
+            with open(pickled, 'rb') as file:
+                return pickle.load(file)
+
+        times = [put_time]
+        for load in (unpickle,
+                     lambda: map_class.load(snapshot, hash, **options),
+                     lambda: map_class.load(snapshot, hash, stream=True, **options),
+                     lambda: map_class.load(snapshot, hash, use_mmap=True, **options)):
+            loaded, seconds = timed(load)
+            assert dict(loaded.items()) == expected
+            times.append(seconds)
+        print(f"{name:>4} " + " ".join(f"{t:>{w}.3f}" for t, w in zip(times, (7, 7, 9, 8, 7)))
+              + f" {os.path.getsize(pickled) / 1e6:>10.1f} {os.path.getsize(snapshot) / 1e6:>12.1f}")
+    os.remove(snapshot)
+    os.remove(pickled)
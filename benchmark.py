@@ -0,0 +1,311 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Reproducible benchmark harness for the HashMap implementations.
+#              Runs each map and hash function through a set of standard
+#              workloads and reports throughput, latency percentiles and
+#              memory use, optionally writing the results as JSON so runs
+#              from different commits can be compared.
+#
+#              python benchmark.py --sizes 1000 100000 --output run.json
+#              python benchmark.py --compare base.json run.json
+#
+#              hash_function_1 and hash_function_2 cluster badly, so the
+#              quadratic probing maps slow down sharply past ~100K keys with
+#              them; use --functions to pick registered hash functions instead.
+
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:     # not available on Windows
+    resource = None
+
+import hash_map_batch
+import hash_map_oa
+import hash_map_oa_compact
+import hash_map_oa_flat
+import hash_map_rh
+import hash_map_sc
+import hash_map_sc_array
+import hash_map_swiss
+from hash_functions import get_hash_function
+
+
+MAPS = {
+    'sc': lambda function: hash_map_sc.HashMap(16, function),
+    'sc_array': lambda function: hash_map_sc_array.HashMap(16, function),
+    'oa': lambda function: hash_map_oa.HashMap(16, function),
+    'oa_flat': lambda function: hash_map_oa_flat.HashMap(16, function),
+    'oa_compact': lambda function: hash_map_oa_compact.HashMap(16, function),
+    'rh': lambda function: hash_map_rh.HashMap(16, function),
+    'swiss': lambda function: hash_map_swiss.HashMap(16, function),
+    'batch': lambda function: hash_map_batch.HashMap(16, function),
+}
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+# ------------------- WORKLOADS -------------------------------------------- #
+#
+# Each workload takes the key count n and a seeded Random and returns
+# (preload, ops): the key:value pairs put into the map before timing starts,
+# and the list of (operation name, key, value) tuples that are timed.
+
+def _keys(n: int, prefix: str = 'key') -> list:
+    """Returns n distinct keys."""
+    return [prefix + str(i) for i in range(n)]
+
+
+def read_heavy(n: int, rng: random.Random) -> (list, list):
+    """90% gets of present keys, 10% puts updating them."""
+    keys = _keys(n)
+    ops = [('get', rng.choice(keys), None) if rng.random() < .9
+           else ('put', rng.choice(keys), i) for i in range(n)]
+    return [(key, 0) for key in keys], ops
+
+
+def write_heavy(n: int, rng: random.Random) -> (list, list):
+    """90% puts, half of them new keys, 10% gets, starting from empty."""
+    keys = _keys(n)
+    ops = []
+    for i in range(n):
+        key = keys[rng.randrange(i // 2 + 1)] if rng.random() < .5 else keys[i]
+        ops.append(('put', key, i) if rng.random() < .9 else ('get', key, None))
+    return [], ops
+
+
+def delete_churn(n: int, rng: random.Random) -> (list, list):
+    """Alternately removes a present key and puts a new one."""
+    keys = _keys(n)
+    fresh = _keys(n, 'new')
+    rng.shuffle(keys)
+    ops = []
+    for i in range(n // 2):
+        ops.append(('remove', keys[i], None))
+        ops.append(('put', fresh[i], i))
+    return [(key, 0) for key in keys], ops
+
+
+def miss_heavy(n: int, rng: random.Random) -> (list, list):
+    """90% gets of absent keys, 10% gets of present ones."""
+    keys = _keys(n)
+    missing = _keys(n, 'miss')
+    ops = [('get', rng.choice(missing if rng.random() < .9 else keys), None)
+           for _ in range(n)]
+    return [(key, 0) for key in keys], ops
+
+
+def zipfian(n: int, rng: random.Random, skew: float = 1.1) -> (list, list):
+    """Gets whose keys follow a Zipf distribution, so a few keys are hot."""
+    keys = _keys(n)
+    weights = [1 / (rank ** skew) for rank in range(1, n + 1)]
+    chosen = rng.choices(keys, weights=weights, k=n)
+    return [(key, 0) for key in keys], [('get', key, None) for key in chosen]
+
+
+def anagram(n: int, rng: random.Random, group: int = 8) -> (list, list):
+    """
+    Puts then gets of keys that are anagrams of each other in groups of
+    size group, which all collide under hash_function_1.
+    """
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    keys, seen = [], set()
+    while len(keys) < n:
+        base = [rng.choice(letters) for _ in range(10)]
+        for _ in range(group):
+            rng.shuffle(base)
+            key = ''.join(base)
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+    keys = keys[:n]
+    ops = [('put', key, i) for i, key in enumerate(keys)]
+    ops += [('get', key, None) for key in keys]
+    return [], ops
+
+
+WORKLOADS = {
+    'read_heavy': read_heavy,
+    'write_heavy': write_heavy,
+    'delete_churn': delete_churn,
+    'miss_heavy': miss_heavy,
+    'zipfian': zipfian,
+    'anagram': anagram,
+}
+
+
+# ------------------- MEASUREMENT ------------------------------------------ #
+
+def _load(m, preload: list) -> None:
+    """Puts the preload pairs into m."""
+    for key, value in preload:
+        m.put(key, value)
+
+
+def _time_ops(m, ops: list) -> list:
+    """Runs ops against m and returns the sorted ns taken by each one."""
+    clock = time.perf_counter_ns
+    methods = {'get': m.get, 'put': m.put, 'remove': m.remove}
+    latencies = []
+    for name, key, value in ops:
+        method = methods[name]
+        if name == 'put':
+            start = clock()
+            method(key, value)
+        else:
+            start = clock()
+            method(key)
+        latencies.append(clock() - start)
+    latencies.sort()
+    return latencies
+
+
+def _peak_rss_kb() -> int:
+    """Returns the peak resident set size of this process in KB, or None."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KB
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_one(map_name: str, function_name: str, workload: str, n: int,
+            seed: int, memory: bool = True) -> dict:
+    """
+    Runs one workload of size n against a fresh map and returns its
+    measurements. Building the workload uses a Random seeded with seed,
+    so every run sees the same operations.
+    """
+    factory, function = MAPS[map_name], get_hash_function(function_name)
+    preload, ops = WORKLOADS[workload](n, random.Random(seed))
+
+    m = factory(function)
+    _load(m, preload)
+    start = time.perf_counter()
+    latencies = _time_ops(m, ops)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'map': map_name,
+        'hash_function': function_name,
+        'workload': workload,
+        'size': n,
+        'ops': len(ops),
+        'ops_per_sec': len(ops) / elapsed if ops and elapsed else None,
+    }
+    # a workload too small to have any ops has no latencies
+    for p in PERCENTILES:
+        index = min(int(len(latencies) * p / 100), len(latencies) - 1)
+        result[f'ns_p{p}'] = latencies[index] if latencies else None
+    result['ns_max'] = latencies[-1] if latencies else None
+
+    # second run under tracemalloc, which slows everything down
+    if memory:
+        tracemalloc.start()
+        m = factory(function)
+        _load(m, preload)
+        _time_ops(m, ops)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['alloc_bytes'] = current
+        result['alloc_peak_bytes'] = peak
+    result['peak_rss_kb'] = _peak_rss_kb()
+    return result
+
+
+def _rate(ops_per_sec: float) -> str:
+    """Formats an ops/sec rate, or '-' if the run has none."""
+    return '-' if ops_per_sec is None else f"{ops_per_sec:.0f}"
+
+
+def _ns(latency: int) -> str:
+    """Formats a latency in ns, or '-' if the run had no ops."""
+    return '-' if latency is None else str(latency)
+
+
+def compare(base_path: str, new_path: str) -> None:
+    """
+    Prints the ops/sec change of each run in new_path against base_path.
+    Runs too fast to time have no rate, shown as '-'.
+    """
+    def load(path):
+        with open(path) as file:
+            results = json.load(file)['results']
+        return {(r['map'], r['hash_function'], r['workload'], r['size']): r for r in results}
+
+    base, new = load(base_path), load(new_path)
+    print(f"{'map':>8} {'function':>16} {'workload':>13} {'size':>9} {'base ops/s':>12} "
+          f"{'new ops/s':>12} {'change':>8}")
+    for key in sorted(base.keys() & new.keys()):
+        old_rate, new_rate = base[key]['ops_per_sec'], new[key]['ops_per_sec']
+        change = '-'
+        if old_rate and new_rate is not None:
+            change = f"{(new_rate / old_rate - 1) * 100:+.1f}%"
+        print(f"{key[0]:>8} {key[1]:>16} {key[2]:>13} {key[3]:>9} {_rate(old_rate):>12} "
+              f"{_rate(new_rate):>12} {change:>8}")
+
+
+def _git_commit() -> str:
+    """Returns the current git commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the HashMap implementations.")
+    parser.add_argument('--maps', nargs='+', default=['sc', 'oa'], choices=sorted(MAPS))
+    parser.add_argument('--functions', nargs='+', default=['hash_function_1', 'hash_function_2'])
+    parser.add_argument('--workloads', nargs='+', default=list(WORKLOADS), choices=list(WORKLOADS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000])
+    parser.add_argument('--seed', type=int, default=261)
+    parser.add_argument('--no-memory', action='store_true',
+                        help="skip the tracemalloc pass")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'),
+                        help="compare two JSON result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = []
+    print(f"{'map':>8} {'function':>16} {'workload':>13} {'size':>9} {'ops/s':>10} "
+          f"{'p50 ns':>8} {'p99 ns':>8} {'p99.9 ns':>9} {'alloc KB':>9}")
+    for n in args.sizes:
+        for workload in args.workloads:
+            for map_name in args.maps:
+                for function_name in args.functions:
+                    r = run_one(map_name, function_name, workload, n, args.seed,
+                                not args.no_memory)
+                    results.append(r)
+                    alloc = r.get('alloc_peak_bytes')
+                    print(f"{map_name:>8} {function_name:>16} {workload:>13} {n:>9} "
+                          f"{_rate(r['ops_per_sec']):>10} {_ns(r['ns_p50']):>8} "
+                          f"{_ns(r['ns_p99']):>8} {_ns(r['ns_p99.9']):>9} "
+                          f"{'-' if alloc is None else alloc // 1024:>9}")
+
+    if args.output:
+        meta = {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+        }
+        with open(args.output, 'w') as file:
+            json.dump({'meta': meta, 'results': results}, file, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Registry of hash functions for use with the HashMap
+#              implementations, plus a report on how evenly each one
+#              spreads a set of keys over the buckets of the SC and OA maps.
+
+
+from hashlib import blake2b
+from itertools import permutations
+
+from a6_include import hash_function_1, hash_function_2
+import hash_map_oa
+import hash_map_sc
+
+
+_MASK_64 = (1 << 64) - 1
+_FNV_OFFSET = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+
+
+def fnv1a(key: str) -> int:
+    """64-bit FNV-1a hash of the UTF-8 bytes of key."""
+    hash = _FNV_OFFSET
+    for byte in key.encode():
+        hash = ((hash ^ byte) * _FNV_PRIME) & _MASK_64
+    return hash
+
+
+def _rotl(x: int, b: int) -> int:
+    """Rotate a 64-bit integer left by b bits."""
+    return ((x << b) | (x >> (64 - b))) & _MASK_64
+
+
+def make_siphash(seed: int = 0):
+    """
+    Return a SipHash-2-4 hash function keyed with a 128-bit seed.
+    Maps built with different seeds place keys differently, which
+    keeps an attacker from choosing keys that all collide.
+    """
+    k0 = seed & _MASK_64
+    k1 = (seed >> 64) & _MASK_64
+
+    def siphash(key: str) -> int:
+        """SipHash-2-4 of the UTF-8 bytes of key."""
+        data = key.encode()
+        v0 = k0 ^ 0x736f6d6570736575
+        v1 = k1 ^ 0x646f72616e646f6d
+        v2 = k0 ^ 0x6c7967656e657261
+        v3 = k1 ^ 0x7465646279746573
+
+        def rounds(count):
+            nonlocal v0, v1, v2, v3
+            for _ in range(count):
+                v0 = (v0 + v1) & _MASK_64
+                v1 = _rotl(v1, 13) ^ v0
+                v0 = _rotl(v0, 32)
+                v2 = (v2 + v3) & _MASK_64
+                v3 = _rotl(v3, 16) ^ v2
+                v0 = (v0 + v3) & _MASK_64
+                v3 = _rotl(v3, 21) ^ v0
+                v2 = (v2 + v1) & _MASK_64
+                v1 = _rotl(v1, 17) ^ v2
+                v2 = _rotl(v2, 32)
+
+        # compress each full 8 byte block
+        end = len(data) - len(data) % 8
+        for i in range(0, end, 8):
+            m = int.from_bytes(data[i:i + 8], 'little')
+            v3 ^= m
+            rounds(2)
+            v0 ^= m
+        # last block holds the remaining bytes and the length
+        m = int.from_bytes(data[end:], 'little') | ((len(data) & 0xff) << 56)
+        v3 ^= m
+        rounds(2)
+        v0 ^= m
+        # finalization
+        v2 ^= 0xff
+        rounds(4)
+        return v0 ^ v1 ^ v2 ^ v3
+
+    return siphash
+
+
+siphash = make_siphash()
+
+
+def builtin_hash(key: str) -> int:
+    """
+    Python's builtin hash(). Fastest option, but string hashes change
+    between processes unless PYTHONHASHSEED is set.
+    """
+    return hash(key)
+
+
+def blake2b_hash(key: str) -> int:
+    """64-bit BLAKE2b digest of the UTF-8 bytes of key."""
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), 'little')
+
+
+HASH_FUNCTIONS = {
+    'hash_function_1': hash_function_1,
+    'hash_function_2': hash_function_2,
+    'fnv1a': fnv1a,
+    'siphash': siphash,
+    'builtin': builtin_hash,
+    'blake2b': blake2b_hash,
+}
+
+
+def register_hash_function(name: str, function) -> None:
+    """Add a hash function to the registry under the given name."""
+    HASH_FUNCTIONS[name] = function
+
+
+def get_hash_function(name: str):
+    """Return the registered hash function with the given name."""
+    if name not in HASH_FUNCTIONS:
+        raise KeyError(f"unknown hash function: {name}")
+    return HASH_FUNCTIONS[name]
+
+
+# ------------------- DISTRIBUTION REPORT ---------------------------------- #
+
+def distribution_report(function, keys: list, capacity: int) -> dict:
+    """
+    Load keys into an SC and an OA HashMap of the given capacity and
+    measure how evenly function spreads them.
+    Returns a dict with the SC chain length histogram (chain length ->
+    number of buckets), the longest SC chain, and the OA probe length
+    histogram (probes needed to find a key -> number of keys) and
+    longest OA probe sequence.
+    """
+    sc = hash_map_sc.HashMap(capacity, function, grow_load=None)
+    oa = hash_map_oa.HashMap(capacity, function)
+    for key in keys:
+        sc.put(key, None)
+        oa.put(key, None)
+
+    chains = {}
+    for index in range(sc.get_capacity()):
+        length = sc._buckets[index].length()
+        chains[length] = chains.get(length, 0) + 1
+
+    probes = {}
+    capacity = oa.get_capacity()
+    for probe in oa.probe_lengths(keys):
+        probes[probe] = probes.get(probe, 0) + 1
+
+    return {
+        'sc_empty_buckets': sc.empty_buckets(),
+        'sc_chain_histogram': dict(sorted(chains.items())),
+        'sc_max_chain': max(chains),
+        'oa_capacity': capacity,
+        'oa_probe_histogram': dict(sorted(probes.items())),
+        'oa_max_probe': max(probes) if probes else 0,
+        'oa_mean_probe': sum(p * c for p, c in probes.items()) / max(len(keys), 1),
+    }
+
+
+if __name__ == "__main__":
+    # kept small: with hash_function_1 every anagram shares one hash, so
+    # each insert into the OA map probes past every earlier anagram
+    key_sets = {
+        'sequential': ['key' + str(i) for i in range(5000)],
+        'anagram': [''.join(p) for p in permutations('abcde')],
+    }
+    for set_name, keys in key_sets.items():
+        print(f"\n{set_name} keys, {len(keys)} keys into 1000 buckets")
+        print(f"{'function':>16} {'sc empty':>9} {'sc max':>7} {'oa max':>7} {'oa mean':>8}")
+        for name, function in HASH_FUNCTIONS.items():
+            report = distribution_report(function, keys, 1000)
+            print(f"{name:>16} {report['sc_empty_buckets']:>9} {report['sc_max_chain']:>7} "
+                  f"{report['oa_max_probe']:>7} {report['oa_mean_probe']:>8.2f}")
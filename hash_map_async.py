@@ -0,0 +1,292 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: asyncio facade over hash_map_sc or hash_map_oa. Single key
+#              operations run straight through; operations that touch the
+#              whole table (resizing, key scans, batches, find_mode) are
+#              split into chunks with a yield to the event loop after each
+#              one, so they never stall other tasks for long.
+#              Usage: python hash_map_async.py [number of keys]
+
+
+import asyncio
+import gc
+import sys
+import time
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+import hash_map_oa
+import hash_map_sc
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, engine: str = 'sc',
+                 chunk_size: int = 1024, rehash_step: int = 4, **options) -> None:
+        """
+        Initialize new HashMap backed by a hash_map_sc HashMap, or a
+        hash_map_oa one if engine is 'oa'. The backing map resizes
+        incrementally, rehash_step buckets per operation, so a put() that
+        triggers a resize doesn't block. Long operations handle chunk_size
+        buckets, keys or values between yields. options are passed on to
+        the backing map's constructor.
+        Changes are serialized by an asyncio.Lock, which resize_table(),
+        clear() and the key scans also hold, so a scan sees one consistent
+        map. get() and contains_key() never wait.
+        """
+        if engine not in ('sc', 'oa'):
+            raise ValueError("engine must be 'sc' or 'oa'")
+        module = hash_map_sc if engine == 'sc' else hash_map_oa
+        self._map = module.HashMap(capacity, function, rehash_step=rehash_step, **options)
+        self._chunk_size = chunk_size
+        self._lock = asyncio.Lock()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return str(self._map)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    def table_load(self) -> float:
+        """
+        Returns the current load factor.
+        """
+        return self._map.table_load()
+
+    # ------------------------------------------------------------------ #
+
+    async def _finish_rehash(self) -> None:
+        """
+        Completes an incremental resize of the backing map, chunk_size
+        buckets at a time.
+        """
+        m = self._map
+        while m.rehash_pending():
+            m.rehash_step(self._chunk_size)
+            await asyncio.sleep(0)
+
+    async def put(self, key: str, value: object) -> None:
+        """
+        Add key:value or update value if key is in the hashmap.
+        """
+        async with self._lock:
+            self._map.put(key, value)
+
+    async def get(self, key: str) -> object:
+        """
+        Returns the value associated with a key.
+        """
+        return self._map.get(key)
+
+    async def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hashmap.
+        """
+        return self._map.contains_key(key)
+
+    async def remove(self, key: str) -> None:
+        """
+        Removes the given key and its value from the hashmap.
+        """
+        async with self._lock:
+            self._map.remove(key)
+
+    async def put_many(self, items) -> None:
+        """
+        Add every key:value pair in items, chunk_size at a time. The
+        backing map is resized once, up front, and its entries moved
+        chunk_size buckets at a time, so no chunk triggers a resize.
+        """
+        items = list(items)
+        async with self._lock:
+            await self._finish_rehash()
+            new_capacity = self._map.capacity_for(len(items))
+            if new_capacity is not None:
+                self._map.resize_table(new_capacity)
+                await self._finish_rehash()
+            for start in range(0, len(items), self._chunk_size):
+                self._map.put_many(items[start:start + self._chunk_size])
+                await asyncio.sleep(0)
+
+    async def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array with the value of each key in keys, or
+        None for keys not in the hashmap, looked up chunk_size at a time.
+        """
+        keys = list(keys)
+        result = DynamicArray()
+        for start in range(0, len(keys), self._chunk_size):
+            for value in self._map.get_many(keys[start:start + self._chunk_size]):
+                result.append(value)
+            await asyncio.sleep(0)
+        return result
+
+    async def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the backing map, moving its entries chunk_size buckets at
+        a time. Changes wait until the resize is done; lookups don't.
+        """
+        async with self._lock:
+            await self._finish_rehash()
+            self._map.resize_table(new_capacity)
+            await self._finish_rehash()
+
+    async def clear(self) -> None:
+        """
+        Clears the hashmap.
+        """
+        async with self._lock:
+            self._map.clear()
+
+    async def items(self):
+        """
+        Async generator over the (key, value) pairs in the hashmap, reading
+        chunk_size buckets between yields to the event loop. Changes wait
+        until the generator finishes or is closed, so the task iterating
+        must not change the map itself.
+        """
+        async with self._lock:
+            await self._finish_rehash()
+            capacity = self._map.get_capacity()
+            for start in range(0, capacity, self._chunk_size):
+                for item in self._map.bucket_items(start, min(start + self._chunk_size, capacity)):
+                    yield item
+                await asyncio.sleep(0)
+
+    async def keys(self):
+        """
+        Async generator over the keys in the hashmap.
+        """
+        async for key, _ in self.items():
+            yield key
+
+    async def get_keys(self) -> DynamicArray:
+        """
+        Returns a dynamic array that contains all the keys stored in the hashmap.
+        """
+        result = DynamicArray()
+        async for key, _ in self.items():
+            result.append(key)
+        return result
+
+
+async def find_mode(values, chunk_size: int = 4096) -> (DynamicArray, int):
+    """
+    Same as hash_map_sc.find_mode, but yields to the event loop after
+    every chunk_size values. values can be an iterable or an async
+    iterable.
+    """
+    mode = DynamicArray()
+    freq = 0
+    counts = hash_map_sc.HashMap(16, hash_function_1, rehash_step=4)
+    count = 0
+
+    def add(value):
+        nonlocal mode, freq
+        total = counts.increment(value)
+        if total > freq:
+            mode = DynamicArray()
+            mode.append(value)
+            freq = total
+        elif total == freq:
+            mode.append(value)
+
+    if hasattr(values, '__aiter__'):
+        async for value in values:
+            add(value)
+            count += 1
+            if count % chunk_size == 0:
+                await asyncio.sleep(0)
+    else:
+        for value in values:
+            add(value)
+            count += 1
+            if count % chunk_size == 0:
+                await asyncio.sleep(0)
+    return (mode, freq)
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+async def _max_lag(work) -> (float, float):
+    """
+    Runs the coroutine work while a ticker task wakes up every
+    millisecond, and returns the worst delay the ticker saw past its
+    wake-up time and the seconds work took, both in milliseconds.
+    """
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(.001)
+            lag = max(lag, time.perf_counter() - start - .001)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(.01)
+    start = time.perf_counter()
+    await work
+    elapsed = time.perf_counter() - start
+    done = True
+    await task
+    return lag * 1000, elapsed * 1000
+
+
+async def _blocking(function, *args):
+    """Calls a plain function from a coroutine, blocking the loop."""
+    return function(*args)
+
+
+async def _benchmark(n: int) -> None:
+    """Prints the event loop lag of long operations, blocking and async."""
+    keys = ['key' + str(i) for i in range(n)]
+    values = [str(i % 1000) for i in range(n)]
+    plain = hash_map_sc.HashMap(16, hash)
+    plain.put_many([(key, key) for key in keys])
+    facade = HashMap(16, hash)
+    await facade.put_many([(key, key) for key in keys])
+    # maps already holding n keys, loaded with n more
+    added = [('new' + str(i), i) for i in range(n)]
+    loaded = {}
+    for engine, module in (('sc', hash_map_sc), ('oa', hash_map_oa)):
+        loaded[engine] = (module.HashMap(16, hash), HashMap(16, hash, engine))
+        loaded[engine][0].put_many([(key, key) for key in keys])
+        await loaded[engine][1].put_many([(key, key) for key in keys])
+    # start from a clean heap; the collector stays on while measuring, so
+    # its pauses over the nodes an operation allocates are in the numbers
+    gc.collect()
+    cases = (
+        ("put_many sc", _blocking(loaded['sc'][0].put_many, added),
+         loaded['sc'][1].put_many(added)),
+        ("put_many oa", _blocking(loaded['oa'][0].put_many, added),
+         loaded['oa'][1].put_many(added)),
+        ("resize_table", _blocking(plain.resize_table, n * 4),
+         facade.resize_table(n * 4)),
+        ("get_keys", _blocking(plain.get_keys), facade.get_keys()),
+        ("get_many", _blocking(plain.get_many, keys), facade.get_many(keys)),
+        ("find_mode", _blocking(hash_map_sc.find_mode, values), find_mode(values)),
+    )
+    print(f"{n} keys, worst event loop lag in ms (operation time in ms)")
+    print(f"{'operation':>12} {'blocking':>18} {'async':>18}")
+    for name, blocking, cooperative in cases:
+        blocking_lag, blocking_time = await _max_lag(blocking)
+        async_lag, async_time = await _max_lag(cooperative)
+        gc.collect()
+        print(f"{name:>12} {blocking_lag:>8.1f} ({blocking_time:>7.0f}) "
+              f"{async_lag:>8.1f} ({async_time:>7.0f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000))
@@ -0,0 +1,502 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Hashmap implemented using open addressing with linear probing,
+#              with batch methods that work on a whole array of keys at once.
+#              With NumPy installed, the slots are NumPy arrays, a batch of
+#              keys is hashed by vectorized versions of hash_function_1 and
+#              hash_function_2 (or builtin hash() for integer keys), and every
+#              key in the batch is probed for together, one slot per round.
+#              Without NumPy, or for a hash function with no vectorized
+#              version, the slots are lists and the batch methods handle one
+#              key at a time. Same single key interface as hash_map_oa.HashMap.
+#              Usage: python hash_map_batch.py [batch size ...]
+
+
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:     # batch methods fall back to one key at a time
+    np = None
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+
+
+# slot states
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+_MASK_64 = (1 << 64) - 1
+# 2**64 / golden ratio; the top bits of hash * _MIX pick the slot, so
+# hashes that only differ in their low bits still spread out
+_MIX = 0x9E3779B97F4A7C15
+# builtin hash() of an int is the int modulo this prime
+_HASH_MODULUS = (1 << 61) - 1
+# keys hashed at a time by _vector_hash_2, bounds its temporary matrix
+_HASH_CHUNK = 1 << 16
+
+
+# --------- Vectorized hash functions --------- #
+# Each takes a 1-D array of keys and returns their hashes masked to 64
+# bits as a uint64 array, or None if it can't hash that kind of array.
+
+def _code_points(keys) -> "np.ndarray":
+    """
+    Returns the code points of a str array as an (n, width) matrix.
+    Keys shorter than width are padded with zeros, which add nothing to
+    either hash.
+    """
+    width = keys.dtype.itemsize // 4
+    return keys.view(np.uint32).reshape(len(keys), width)
+
+
+def _vector_hash_1(keys) -> "np.ndarray":
+    """hash_function_1 of every key in a str array."""
+    if keys.dtype.kind != 'U':
+        return None
+    return _code_points(keys).sum(axis=1, dtype=np.uint64)
+
+
+def _vector_hash_2(keys) -> "np.ndarray":
+    """hash_function_2 of every key in a str array."""
+    if keys.dtype.kind != 'U':
+        return None
+    codes = _code_points(keys)
+    weights = np.arange(1, codes.shape[1] + 1, dtype=np.uint64)
+    hashes = np.empty(len(keys), np.uint64)
+    for start in range(0, len(keys), _HASH_CHUNK):
+        hashes[start:start + _HASH_CHUNK] = \
+            codes[start:start + _HASH_CHUNK].astype(np.uint64) @ weights
+    return hashes
+
+
+def _vector_hash_builtin(keys) -> "np.ndarray":
+    """Builtin hash() of every key in an integer array."""
+    if keys.dtype.kind not in 'iu' or len(keys) == 0:
+        return None
+    if keys.dtype.kind == 'u':
+        if keys.max() >= _HASH_MODULUS:
+            return None
+        return keys.astype(np.uint64)
+    keys = keys.astype(np.int64)
+    # ints this large are reduced modulo _HASH_MODULUS, leave them to hash()
+    if keys.min() <= -_HASH_MODULUS or keys.max() >= _HASH_MODULUS:
+        return None
+    # -1 is reserved as an error value in CPython, so hash(-1) == -2
+    hashes = np.where(keys == -1, -2, keys)
+    # negative hashes wrap around like hash & _MASK_64
+    return hashes.astype(np.uint64)
+
+
+_VECTOR_HASHES = {
+    hash_function_1: _vector_hash_1,
+    hash_function_2: _vector_hash_2,
+    hash: _vector_hash_builtin,
+}
+
+
+class HashMap:
+    def __init__(self, capacity: int, function) -> None:
+        """
+        Initialize new HashMap that uses linear probing for collision
+        resolution. capacity is rounded up to a power of two. Slot i is
+        described by _states[i], _hashes[i], _keys[i] and _values[i],
+        NumPy arrays if NumPy is installed and lists otherwise. Hashes are
+        stored masked to 64 bits.
+        """
+        self._hash_function = function
+        self._vector_hash = _VECTOR_HASHES.get(function) if np is not None else None
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Set up an empty table of at least capacity slots.
+        """
+        bits = 3
+        while 1 << bits < capacity:
+            bits += 1
+        capacity = 1 << bits
+        if np is not None:
+            self._states = np.zeros(capacity, np.uint8)
+            self._hashes = np.zeros(capacity, np.uint64)
+            self._keys = np.full(capacity, None, object)
+            self._values = np.full(capacity, None, object)
+        else:
+            self._states = bytearray(capacity)
+            self._hashes = [0] * capacity
+            self._keys = [None] * capacity
+            self._values = [None] * capacity
+        # the slot of a hash is the top bits of hash * _MIX
+        self._shift = 64 - bits
+        self._capacity = capacity
+        self._size = 0
+        self._tombstones = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output.
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._states[i] == EMPTY:
+                slot = 'None'
+            else:
+                slot = f"K: {self._keys[i]} V: {self._values[i]} " \
+                       f"TS: {self._states[i] == TOMBSTONE}"
+            out += str(i) + ': ' + slot + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: object, hash: int) -> int:
+        """
+        Returns the slot holding key, or -1 if the key is not in the map.
+        hash is the key's hash masked to 64 bits.
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        mask = self._capacity - 1
+        index = ((hash * _MIX) & _MASK_64) >> self._shift
+        # probe for given key, skipping tombstones
+        while states[index] != EMPTY:
+            if states[index] == LIVE and hashes[index] == hash and keys[index] == key:
+                return index
+            index = (index + 1) & mask
+        return -1
+
+    def put(self, key: object, value: object) -> None:
+        """
+        Add key:value or update value if key is in the hashmap.
+        """
+        # rehash before adding if live entries and tombstones pass .5
+        if self._size + self._tombstones + 1 > self._capacity // 2:
+            self.resize_table(self._capacity if self._tombstones > self._size
+                              else self._capacity * 2)
+        states, hashes, keys = self._states, self._hashes, self._keys
+        mask = self._capacity - 1
+        hash = self._hash_function(key) & _MASK_64
+        index = ((hash * _MIX) & _MASK_64) >> self._shift
+        tombstone = -1
+        # probe for existing key or empty slot to add
+        while states[index] != EMPTY:
+            if states[index] == TOMBSTONE:
+                # remember first tombstone so it can be reused
+                if tombstone < 0:
+                    tombstone = index
+            elif hashes[index] == hash and keys[index] == key:
+                # update existing key:value
+                self._values[index] = value
+                return
+            index = (index + 1) & mask
+        # key not found, add key:value in first free slot
+        if tombstone >= 0:
+            index = tombstone
+            self._tombstones -= 1
+        states[index] = LIVE
+        hashes[index] = hash
+        keys[index] = key
+        self._values[index] = value
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Returns the table load factor.
+        """
+        return float(self._size/self._capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets. Buckets holding a tombstone
+        are not empty.
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the hashmap keeping all pre-existing
+        key value pairs, rounded up to a power of two that keeps the
+        load at or below .5. Cached hashes are reused and tombstones
+        dropped.
+        """
+        # non valid new capacity
+        if new_capacity < 1 or new_capacity < self._size:
+            return
+        new_capacity = max(new_capacity, self._size * 2)
+        if np is not None:
+            live = np.flatnonzero(self._states == LIVE)
+            hashes, keys = self._hashes[live], self._keys[live]
+            values, size = self._values[live], self._size
+            self._allocate(new_capacity)
+            self._place(hashes, keys, values)
+            self._size = size
+            return
+        old = zip(self._states, self._hashes, self._keys, self._values)
+        size = self._size
+        self._allocate(new_capacity)
+        states, hashes, keys, values = self._states, self._hashes, self._keys, self._values
+        mask = self._capacity - 1
+        for state, hash, key, value in old:
+            if state != LIVE:
+                continue
+            index = ((hash * _MIX) & _MASK_64) >> self._shift
+            while states[index] != EMPTY:
+                index = (index + 1) & mask
+            states[index] = LIVE
+            hashes[index] = hash
+            keys[index] = key
+            values[index] = value
+        self._size = size
+
+    def get(self, key: object) -> object:
+        """
+        Returns the value associated with a key.
+        """
+        index = self._find(key, self._hash_function(key) & _MASK_64)
+        if index < 0:
+            return None
+        return self._values[index]
+
+    def contains_key(self, key: object) -> bool:
+        """
+        Returns True if the given key is in the hashmap.
+        """
+        return self._find(key, self._hash_function(key) & _MASK_64) >= 0
+
+    def remove(self, key: object) -> None:
+        """
+        Removes the given key and its value from the hashmap.
+        """
+        index = self._find(key, self._hash_function(key) & _MASK_64)
+        if index < 0:
+            return
+        # set slot to tombstone, drop references to key and value
+        self._states[index] = TOMBSTONE
+        self._keys[index] = None
+        self._values[index] = None
+        self._size -= 1
+        self._tombstones += 1
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hashmap.
+        """
+        self._allocate(self._capacity)
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a dynamic array that contains all the keys stored in the hashmap.
+        """
+        if np is not None:
+            return DynamicArray(self._keys[self._states == LIVE].tolist())
+        result = DynamicArray()
+        for index in range(self._capacity):
+            if self._states[index] == LIVE:
+                result.append(self._keys[index])
+        return result
+
+    # ------------------- BATCH ------------------------------------------ #
+
+    def _batch_hashes(self, keys):
+        """
+        Returns keys as a 1-D NumPy array and their hashes, or (None, None)
+        if the batch can't be hashed in one go. A list is converted with
+        numpy.asarray(), so it must hold keys of one type; ASCII byte
+        strings are decoded to str first, as the keys are stored as str.
+        """
+        if self._vector_hash is None:
+            return None, None
+        array = np.asarray(keys)
+        if array.ndim != 1:
+            return None, None
+        if array.dtype.kind == 'S':
+            array = array.astype(f'U{array.dtype.itemsize}')
+        array = np.ascontiguousarray(array)
+        hashes = self._vector_hash(array)
+        if hashes is None:
+            return None, None
+        return array, hashes
+
+    def _start_slots(self, hashes) -> "np.ndarray":
+        """
+        Returns the first slot probed for each hash in a uint64 array.
+        """
+        # uint64 multiplication wraps around like & _MASK_64
+        return ((hashes * np.uint64(_MIX)) >> np.uint64(self._shift)).astype(np.intp)
+
+    def _lookup(self, hashes, keys) -> "np.ndarray":
+        """
+        Returns the slot holding each key in the object array keys, or -1
+        for keys not in the map. All the keys advance one slot per round,
+        and a key drops out when it is found or reaches an EMPTY slot.
+        Stored keys are only compared where the hashes match.
+        """
+        mask = self._capacity - 1
+        result = np.full(len(keys), -1, np.intp)
+        slots = self._start_slots(hashes)
+        pending = np.arange(len(keys))
+        while pending.size:
+            probed = slots[pending]
+            states = self._states[probed]
+            candidates = np.flatnonzero((states == LIVE) &
+                                        (self._hashes[probed] == hashes[pending]))
+            found = candidates[self._keys[probed[candidates]] == keys[pending[candidates]]]
+            result[pending[found]] = probed[found]
+            going = states != EMPTY
+            going[found] = False
+            pending = pending[going]
+            slots[pending] = (probed[going] + 1) & mask
+        return result
+
+    def _place(self, hashes, keys, values) -> None:
+        """
+        Adds each key in the object array keys, none of which are in the
+        map or repeated, with its value. Keys whose probe reaches a free
+        slot in the same round compete for it; one takes it and the rest
+        move on to the next slot. Does not update the size.
+        """
+        mask = self._capacity - 1
+        slots = self._start_slots(hashes)
+        pending = np.arange(len(keys))
+        while pending.size:
+            probed = slots[pending]
+            free = np.flatnonzero(self._states[probed] != LIVE)
+            taken, first = np.unique(probed[free], return_index=True)
+            winners = pending[free[first]]
+            self._tombstones -= int(np.count_nonzero(self._states[taken] == TOMBSTONE))
+            self._states[taken] = LIVE
+            self._hashes[taken] = hashes[winners]
+            self._keys[taken] = keys[winners]
+            self._values[taken] = values[winners]
+            going = np.ones(pending.size, bool)
+            going[free[first]] = False
+            pending = pending[going]
+            slots[pending] = (probed[going] + 1) & mask
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array with the value of each key in keys, or
+        None for keys not in the hashmap. keys can be a list or a NumPy
+        array of str, bytes or integers; with NumPy and a vectorized hash
+        function the whole batch is hashed and probed for at once.
+        """
+        array, hashes = self._batch_hashes(keys)
+        if array is None:
+            result = DynamicArray()
+            for key in keys:
+                result.append(self.get(key))
+            return result
+        slots = self._lookup(hashes, array.astype(object))
+        values = np.full(len(slots), None, object)
+        hit = slots >= 0
+        values[hit] = self._values[slots[hit]]
+        return DynamicArray(values.tolist())
+
+    def put_many(self, items, size_hint: int = None) -> None:
+        """
+        Add every key:value pair in items, as put_arrays() does.
+        size_hint, if given, is the expected number of distinct keys and
+        the table is grown to fit them up front.
+        """
+        if size_hint is not None and (self._size + size_hint) * 2 > self._capacity:
+            self.resize_table((self._size + size_hint) * 2)
+        items = list(items)
+        if items:
+            keys, values = zip(*items)
+            self.put_arrays(keys, values)
+
+    def put_arrays(self, keys, values) -> None:
+        """
+        Adds each key in keys with the value at the same position in
+        values, updating keys already in the map. If a key appears more
+        than once, its last value is kept. Batches are handled as in
+        get_many().
+        """
+        array, hashes = self._batch_hashes(keys)
+        if array is None:
+            for key, value in zip(keys, values):
+                self.put(key, value)
+            return
+        column = np.fromiter(values, object, count=len(array))
+        # keep the last occurrence of each key
+        _, last = np.unique(array[::-1], return_index=True)
+        if len(last) < len(array):
+            keep = np.sort(len(array) - 1 - last)
+            array, hashes, column = array[keep], hashes[keep], column[keep]
+        keys = array.astype(object)
+        slots = self._lookup(hashes, keys)
+        hit = slots >= 0
+        self._values[slots[hit]] = column[hit]
+        new = np.flatnonzero(~hit)
+        # grow once for the whole batch, or rehash away tombstones
+        if self._size + new.size > self._capacity // 2:
+            self.resize_table((self._size + new.size) * 2)
+        elif self._size + self._tombstones + new.size > self._capacity // 2:
+            self.resize_table(self._capacity)
+        self._place(hashes[new], keys[new], column[new])
+        self._size += new.size
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def _seconds(function, *args) -> (object, float):
+    """Returns function's result and the seconds it took."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # python hash_map_batch.py [batch size ...], e.g. 100000 1000000 10000000
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    if np is None:
+        print("NumPy is not installed, the batch path falls back to one key at a time")
+    print("ns per key, one key at a time vs. whole batch")
+    print(f"{'size':>9} {'operation':>22} {'scalar':>8} {'batch':>8} {'speedup':>8}")
+    for n in sizes:
+        words = ['key' + str(i) for i in range(n)]
+        # hashing alone; these functions collide too much to build big maps
+        if np is not None:
+            words_array = np.array(words)
+            for function in (hash_function_1, hash_function_2):
+                _, scalar = _seconds(lambda: [function(word) for word in words])
+                _, batch = _seconds(_VECTOR_HASHES[function], words_array)
+                print(f"{n:>9} {function.__name__:>22} {scalar / n * 1e9:>8.0f} "
+                      f"{batch / n * 1e9:>8.0f} {scalar / batch:>7.1f}x")
+        # building and querying a map of integer keys with builtin hash()
+        ints = list(range(0, n * 7, 7))
+        misses = list(range(1, n * 7, 7))
+        keys = np.array(ints) if np is not None else ints
+        miss_keys = np.array(misses) if np is not None else misses
+        scalar_map, batch_map = HashMap(16, hash), HashMap(16, hash)
+
+        def put_each():
+            for key in ints:
+                scalar_map.put(key, key)
+
+        def get_each(keys):
+            return [scalar_map.get(key) for key in keys]
+
+        cases = (
+            ("put", put_each, lambda: batch_map.put_arrays(keys, ints)),
+            ("get hit", lambda: get_each(ints), lambda: batch_map.get_many(keys)),
+            ("get miss", lambda: get_each(misses), lambda: batch_map.get_many(miss_keys)),
+        )
+        for name, each, whole in cases:
+            _, scalar = _seconds(each)
+            _, batch = _seconds(whole)
+            print(f"{n:>9} {'int ' + name:>22} {scalar / n * 1e9:>8.0f} "
+                  f"{batch / n * 1e9:>8.0f} {scalar / batch:>7.1f}x")
+        assert batch_map.get_size() == scalar_map.get_size() == n
@@ -0,0 +1,355 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Bounded cache built on hash_map_sc.HashMap. The map's values
+#              are _CacheEntry objects that are also the nodes of a doubly
+#              linked recency list, so a hit moves its entry to the front and
+#              eviction unlinks the least recently used entry, both O(1).
+#              The cache holds at most max_entries entries and/or max_bytes
+#              bytes, and entries can expire after a time to live: expired
+#              entries are dropped when looked up, and a heap of expiry times
+#              lets put() sweep out a batch of them at a time.
+#              The cache hashes each key once and hands the hash to the map
+#              through hash_map_sc.HashMap's get_node(), add() and remove(),
+#              and relies on get_node() returning the map's own node, so it
+#              only works on top of hash_map_sc.
+#              Usage: python hash_map_cache.py [number of lookups]
+
+
+import heapq
+import random
+import sys
+import time
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+import hash_map_sc
+
+
+class _CacheEntry:
+    """
+    Value stored in the map for each cached key, and a node of the
+    recency list. An entry not in the list has prev None.
+    """
+
+    __slots__ = ('key', 'value', 'hash', 'size', 'expires', 'prev', 'next')
+
+    def __init__(self, key: object = None, value: object = None, hash: int = 0,
+                 size: int = 0, expires: float = None) -> None:
+        """Initialize an unlinked entry."""
+        self.key = key
+        self.value = value
+        self.hash = hash
+        self.size = size
+        self.expires = expires
+        self.prev = None
+        self.next = None
+
+
+class LRUCache:
+    def __init__(self, max_entries: int, function, max_bytes: int = None,
+                 ttl: float = None, sizeof=None, sweep_batch: int = 64,
+                 clock=time.monotonic) -> None:
+        """
+        Initialize an empty cache holding at most max_entries entries,
+        or no entry limit if it is None. If max_bytes is given, the sizes
+        of the cached keys and values, as measured by sizeof (default
+        sys.getsizeof of each), are kept at or below it too. Once either
+        limit would be passed the least recently used entries are evicted.
+        If ttl is given, entries expire ttl seconds (as measured by clock)
+        after they were put, unless put() is given its own ttl. Each put()
+        removes up to sweep_batch expired entries.
+        """
+        if max_entries is None and max_bytes is None:
+            raise ValueError("at least one of max_entries and max_bytes is needed")
+        self._map = hash_map_sc.HashMap(16, function)
+        self._hash_function = function
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._sizeof = sizeof
+        self._sweep_batch = sweep_batch
+        self._clock = clock
+        self._bytes = 0
+        # sentinel of the circular recency list: _head.next is the most
+        # recently used entry, _head.prev the least
+        self._head = _CacheEntry()
+        self._head.prev = self._head.next = self._head
+        # (expires, sequence, entry) for every entry put with a ttl; stale
+        # items are skipped when popped
+        self._expiry = []
+        self._sequence = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output, most
+        recently used entry first.
+        """
+        out = ''
+        entry = self._head.next
+        while entry is not self._head:
+            out += f"K: {entry.key} V: {entry.value}\n"
+            entry = entry.next
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return number of cached entries, including expired ones not yet
+        removed.
+        """
+        return self._map.get_size()
+
+    # ------------------------------------------------------------------ #
+
+    def _link(self, entry: _CacheEntry) -> None:
+        """
+        Puts entry at the front of the recency list.
+        """
+        head = self._head
+        entry.prev = head
+        entry.next = head.next
+        head.next.prev = entry
+        head.next = entry
+
+    def _unlink(self, entry: _CacheEntry) -> None:
+        """
+        Takes entry out of the recency list.
+        """
+        entry.prev.next = entry.next
+        entry.next.prev = entry.prev
+        entry.prev = entry.next = None
+
+    def _drop(self, entry: _CacheEntry) -> None:
+        """
+        Removes entry from the map and the recency list.
+        """
+        self._map.remove(entry.key, entry.hash)
+        self._unlink(entry)
+        self._bytes -= entry.size
+
+    def _entry(self, key: object, hash: int) -> _CacheEntry:
+        """
+        Returns the live entry for key, or None. An expired entry is
+        removed and None returned.
+        """
+        node = self._map.get_node(key, hash)
+        if node is None:
+            return None
+        entry = node.value
+        if entry.expires is not None and entry.expires <= self._clock():
+            self._drop(entry)
+            self._expirations += 1
+            return None
+        return entry
+
+    def _size_of(self, key: object, value: object) -> int:
+        """
+        Returns the bytes charged to a key:value pair against max_bytes.
+        """
+        if self._max_bytes is None:
+            return 0
+        if self._sizeof is not None:
+            return self._sizeof(key, value)
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    def _store(self, key: object, value: object, hash: int, ttl: float) -> None:
+        """
+        Adds key:value, or updates it if key is cached, as the most
+        recently used entry, then evicts down to the limits.
+        """
+        size = self._size_of(key, value)
+        if ttl is None:
+            ttl = self._ttl
+        expires = None if ttl is None else self._clock() + ttl
+        node = self._map.get_node(key, hash)
+        if node is not None:
+            entry = node.value
+            self._unlink(entry)
+            self._bytes -= entry.size
+            entry.value, entry.size, entry.expires = value, size, expires
+        else:
+            entry = _CacheEntry(key, value, hash, size, expires)
+            self._map.add(key, entry, hash)
+        self._link(entry)
+        self._bytes += size
+        if expires is not None:
+            self._sequence += 1
+            heapq.heappush(self._expiry, (expires, self._sequence, entry))
+        if self._expiry:
+            self.sweep(self._sweep_batch)
+        self._evict()
+
+    def _over_limit(self) -> bool:
+        """
+        Returns True if the cache holds too many entries or bytes.
+        """
+        return (self._max_entries is not None and self._map.get_size() > self._max_entries) \
+            or (self._max_bytes is not None and self._bytes > self._max_bytes)
+
+    def _evict(self) -> None:
+        """
+        Evicts least recently used entries until both limits are met,
+        after first removing every expired entry. An entry larger than
+        max_bytes on its own ends up evicted too.
+        """
+        if not self._over_limit():
+            return
+        # expired entries go before any live one is evicted
+        if self._expiry:
+            self.sweep()
+        head = self._head
+        while head.prev is not head and self._over_limit():
+            self._drop(head.prev)
+            self._evictions += 1
+
+    def sweep(self, limit: int = None) -> int:
+        """
+        Removes up to limit expired entries, or all of them if limit is
+        None, soonest expiring first. Returns the number removed.
+        """
+        expiry, now = self._expiry, self._clock()
+        removed = 0
+        while expiry and expiry[0][0] <= now and (limit is None or removed < limit):
+            expires, _, entry = heapq.heappop(expiry)
+            # skip entries since removed or put again with a new expiry
+            if entry.prev is None or entry.expires != expires:
+                continue
+            self._drop(entry)
+            self._expirations += 1
+            removed += 1
+        # rebuild once stale items outnumber the live entries
+        if len(expiry) > 2 * self._map.get_size() + self._sweep_batch:
+            self._expiry = [item for item in expiry
+                            if item[2].prev is not None and item[2].expires == item[0]]
+            heapq.heapify(self._expiry)
+        return removed
+
+    def put(self, key: object, value: object, ttl: float = None) -> None:
+        """
+        Cache key:value, replacing any value cached for key. ttl, if
+        given, overrides the cache's time to live for this entry.
+        """
+        self._store(key, value, self._hash_function(key), ttl)
+
+    def get(self, key: object, default: object = None) -> object:
+        """
+        Returns the value cached for key and marks it most recently
+        used, or default if key isn't cached or has expired.
+        """
+        entry = self._entry(key, self._hash_function(key))
+        if entry is None:
+            self._misses += 1
+            return default
+        self._hits += 1
+        self._unlink(entry)
+        self._link(entry)
+        return entry.value
+
+    def get_or_compute(self, key: object, function, ttl: float = None) -> object:
+        """
+        Returns the value cached for key, or on a miss caches and returns
+        function(key). The key is hashed once either way. function may
+        use the cache itself, e.g. a memoized recursive function.
+        """
+        hash = self._hash_function(key)
+        entry = self._entry(key, hash)
+        if entry is not None:
+            self._hits += 1
+            self._unlink(entry)
+            self._link(entry)
+            return entry.value
+        self._misses += 1
+        value = function(key)
+        self._store(key, value, hash, ttl)
+        return value
+
+    def contains_key(self, key: object) -> bool:
+        """
+        Returns True if key is cached and not expired. Does not change
+        its recency or the hit and miss counts.
+        """
+        return self._entry(key, self._hash_function(key)) is not None
+
+    def remove(self, key: object) -> None:
+        """
+        Removes key and its value from the cache.
+        """
+        node = self._map.get_node(key, self._hash_function(key))
+        if node is not None:
+            self._drop(node.value)
+
+    def clear(self) -> None:
+        """
+        Clears the cache. The counters are kept.
+        """
+        self._map.clear()
+        self._head.prev = self._head.next = self._head
+        self._expiry = []
+        self._bytes = 0
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a dynamic array of the cached keys, most recently used
+        first.
+        """
+        result = DynamicArray()
+        entry = self._head.next
+        while entry is not self._head:
+            result.append(entry.key)
+            entry = entry.next
+        return result
+
+    def stats(self) -> dict:
+        """
+        Returns the size and limits of the cache and its hit, miss,
+        eviction and expiration counts.
+        """
+        lookups = self._hits + self._misses
+        return {
+            'size': self._map.get_size(),
+            'max_entries': self._max_entries,
+            'bytes': self._bytes,
+            'max_bytes': self._max_bytes,
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / lookups if lookups else 0.0,
+            'evictions': self._evictions,
+            'expirations': self._expirations,
+        }
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def _zipf_keys(n: int, universe: int, seed: int = 0) -> list:
+    """Returns n keys drawn from universe keys with a Zipf-like skew."""
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, universe + 1)]
+    return ['key' + str(i) for i in rng.choices(range(universe), weights, k=n)]
+
+
+if __name__ == "__main__":
+    # python hash_map_cache.py [number of lookups]
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    universe = n // 5
+    keys = _zipf_keys(n, universe)
+    print(f"{n} zipfian lookups over {universe} keys, get_or_compute()")
+    print(f"{'max_entries':>12} {'hit rate':>9} {'evictions':>10} {'size':>8} {'ns/op':>7}")
+    for max_entries in (universe // 100, universe // 10, universe // 2, universe):
+        cache = LRUCache(max_entries, hash)
+        start = time.perf_counter_ns()
+        for key in keys:
+            cache.get_or_compute(key, len)
+        elapsed = time.perf_counter_ns() - start
+        stats = cache.stats()
+        print(f"{max_entries:>12} {stats['hit_rate']:>9.3f} {stats['evictions']:>10} "
+              f"{stats['size']:>8} {elapsed / n:>7.0f}")
+    # the unbounded map the cache replaces, for the per-op overhead
+    m = hash_map_sc.HashMap(16, hash)
+    start = time.perf_counter_ns()
+    for key in keys:
+        if m.get(key) is None:
+            m.put(key, len(key))
+    elapsed = time.perf_counter_ns() - start
+    print(f"{'unbounded':>12} {'':>9} {'':>10} {m.get_size():>8} {elapsed / n:>7.0f}")
@@ -0,0 +1,360 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Thread-safe hashmap using separate chaining with lock striping.
+#              Bucket i is guarded by lock i % stripes, so writers to buckets
+#              under different locks don't wait for each other. Resizing
+#              and clearing take every lock. Readers take no lock: they
+#              search a snapshot of the bucket array and retry if a resize
+#              replaced it meanwhile.
+#              Usage: python hash_map_concurrent.py [threads] [ops per thread]
+
+
+import random
+import sys
+import threading
+
+from a6_include import (DynamicArray, SLNode, hash_function_1, hash_function_2)
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, stripes: int = 16,
+                 grow_load: float = 1.0) -> None:
+        """
+        Initialize new HashMap that uses separate chaining for collision
+        resolution and is safe to share between threads. _buckets[i] is the
+        head SLNode of bucket i's chain, or None. The table doubles when a
+        put() pushes the load factor above grow_load (None to never grow).
+        """
+        capacity = max(capacity, 1)
+        self._buckets = [None] * capacity
+        self._hash_function = function
+        self._grow_load = grow_load
+        self._stripes = stripes
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # entries in the buckets guarded by each lock, changed under that lock
+        self._counts = [0] * stripes
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        out = ''
+        for i, node in enumerate(self._buckets):
+            content = []
+            while node is not None:
+                content.append(str(node))
+                node = node.next
+            out += str(i) + ': SLL [' + ' -> '.join(content) + ']\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return sum(self._counts)
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return len(self._buckets)
+
+    # ------------------------------------------------------------------ #
+
+    def _lock_bucket(self, hash: int) -> (list, int, int):
+        """
+        Acquires the lock guarding hash's bucket in the current table and
+        returns the table, the bucket index and the stripe. The caller must
+        release self._locks[stripe].
+        """
+        while True:
+            buckets = self._buckets
+            index = hash % len(buckets)
+            stripe = index % self._stripes
+            self._locks[stripe].acquire()
+            # a resize may have swapped tables before the lock was acquired
+            if self._buckets is buckets:
+                return buckets, index, stripe
+            self._locks[stripe].release()
+
+    def _lock_all(self) -> None:
+        """
+        Acquires every lock, always in the same order so two callers can't
+        deadlock.
+        """
+        for lock in self._locks:
+            lock.acquire()
+
+    def _unlock_all(self) -> None:
+        """
+        Releases every lock.
+        """
+        for lock in reversed(self._locks):
+            lock.release()
+
+    def _find(self, key: str, hash: int) -> SLNode:
+        """
+        Returns the node holding key, or None, without taking a lock.
+        The search is repeated if the table was replaced while it ran, since
+        a put() made after the resize would not be in the old table.
+        """
+        while True:
+            buckets = self._buckets
+            node = buckets[hash % len(buckets)]
+            while node is not None:
+                if node.hash == hash and node.key == key:
+                    break
+                node = node.next
+            if self._buckets is buckets:
+                return node
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Add a key:value pair to the hash map. If the key already exists,
+        update the value to the new value.
+        """
+        hash = self._hash_function(key)
+        buckets, index, stripe = self._lock_bucket(hash)
+        try:
+            node = buckets[index]
+            while node is not None:
+                if node.hash == hash and node.key == key:
+                    node.value = value
+                    return
+                node = node.next
+            # publish the new node only once it is fully built
+            buckets[index] = SLNode(key, value, buckets[index], hash)
+            self._counts[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+        self._grow_if_needed(len(buckets))
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Add amount to the value stored for key, treating a missing key as
+        0, and return the new value. Concurrent increments of the same key
+        are never lost.
+        """
+        hash = self._hash_function(key)
+        buckets, index, stripe = self._lock_bucket(hash)
+        try:
+            node = buckets[index]
+            while node is not None:
+                if node.hash == hash and node.key == key:
+                    node.value += amount
+                    return node.value
+                node = node.next
+            buckets[index] = SLNode(key, amount, buckets[index], hash)
+            self._counts[stripe] += 1
+        finally:
+            self._locks[stripe].release()
+        self._grow_if_needed(len(buckets))
+        return amount
+
+    def _grow_if_needed(self, capacity: int) -> None:
+        """
+        Doubles the table if the load passed grow_load, unless another
+        thread already resized it away from capacity.
+        """
+        if self._grow_load is not None and self.get_size() > self._grow_load * capacity:
+            self._resize(capacity * 2, capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets.
+        """
+        return self._buckets.count(None)
+
+    def table_load(self) -> float:
+        """
+        Returns the current load factor.
+        """
+        return float(self.get_size()/self.get_capacity())
+
+    def clear(self) -> None:
+        """
+        Clears the hash map.
+        """
+        self._lock_all()
+        try:
+            self._buckets = [None] * len(self._buckets)
+            self._counts = [0] * self._stripes
+        finally:
+            self._unlock_all()
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the hash map, rehashing all key:values with their cached
+        hashes. Writers wait until it finishes, readers don't.
+        """
+        self._resize(new_capacity, None)
+
+    def _resize(self, new_capacity: int, expected: int) -> None:
+        """
+        Resizes the hash map to new_capacity while holding every lock. If
+        expected is given the resize is skipped unless the capacity is
+        still expected. The old chains are copied rather than relinked, so
+        readers still walking the old table see it unchanged.
+        """
+        if new_capacity < 1:
+            return
+        self._lock_all()
+        try:
+            old_buckets = self._buckets
+            if expected is not None and len(old_buckets) != expected:
+                return
+            buckets = [None] * new_capacity
+            counts = [0] * self._stripes
+            for node in old_buckets:
+                while node is not None:
+                    index = node.hash % new_capacity
+                    buckets[index] = SLNode(node.key, node.value, buckets[index], node.hash)
+                    counts[index % self._stripes] += 1
+                    node = node.next
+            self._counts = counts
+            self._buckets = buckets
+        finally:
+            self._unlock_all()
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key.
+        """
+        node = self._find(key, self._hash_function(key))
+        if node is None:
+            return None
+        return node.value
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns true if the key is in the hash map.
+        """
+        return self._find(key, self._hash_function(key)) is not None
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the key and its value from the hash map. The removed node
+        keeps its next link, so a reader standing on it can carry on.
+        """
+        hash = self._hash_function(key)
+        buckets, index, stripe = self._lock_bucket(hash)
+        try:
+            previous, node = None, buckets[index]
+            while node is not None:
+                if node.hash == hash and node.key == key:
+                    if previous is None:
+                        buckets[index] = node.next
+                    else:
+                        previous.next = node.next
+                    self._counts[stripe] -= 1
+                    return
+                previous, node = node, node.next
+        finally:
+            self._locks[stripe].release()
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Get all keys in the Hashmap and return them in a dynamic array.
+        The keys are read while every lock is held, so they form one
+        consistent snapshot.
+        """
+        result = DynamicArray()
+        self._lock_all()
+        try:
+            for node in self._buckets:
+                while node is not None:
+                    result.append(node.key)
+                    node = node.next
+        finally:
+            self._unlock_all()
+        return result
+
+
+# ------------------- STRESS TEST ------------------------------------------ #
+
+SHARED_KEYS = 8
+
+
+def _worker(m: HashMap, thread: int, ops: int, expected: dict,
+            increments: list, errors: list, seed: int) -> None:
+    """
+    Runs ops random put/get/remove calls on keys owned by this thread,
+    mirroring them in expected, mixed with increments of keys shared by
+    every thread, counted in increments[thread]. Each get of an owned key
+    must see the thread's last write to it.
+    """
+    rng = random.Random(seed)
+    for i in range(ops):
+        key = f"t{thread}-{rng.randrange(200)}"
+        choice = rng.random()
+        if choice < .4:
+            m.put(key, i)
+            expected[key] = i
+        elif choice < .6:
+            m.remove(key)
+            expected.pop(key, None)
+        elif choice < .9:
+            value = m.get(key)
+            if value != expected.get(key):
+                errors.append(f"stale read: {key} is {value}, expected {expected.get(key)}")
+        else:
+            m.increment(f"shared-{i % SHARED_KEYS}")
+            increments[thread] += 1
+
+
+def _resizer(m: HashMap, stop: threading.Event, seed: int) -> None:
+    """Keeps resizing m to random capacities until stop is set."""
+    rng = random.Random(seed)
+    while not stop.is_set():
+        m.resize_table(rng.randrange(1, 2000))
+
+
+def stress(threads: int, ops: int, seed: int = 261) -> (list, HashMap):
+    """
+    Runs threads workers against one map while another thread keeps
+    resizing it, then checks that no put, remove or increment was lost.
+    Returns the problems found, empty if there were none, and the map.
+    """
+    m = HashMap(4, hash_function_2, stripes=8)
+    expected = [{} for _ in range(threads)]
+    increments = [0] * threads
+    errors = []
+    workers = [threading.Thread(target=_worker, args=(m, t, ops, expected[t], increments,
+                                                      errors, seed + t))
+               for t in range(threads)]
+    stop = threading.Event()
+    resizer = threading.Thread(target=_resizer, args=(m, stop, seed))
+    resizer.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop.set()
+    resizer.join()
+
+    # each thread's own keys hold its last write, and nothing else is left
+    size = 0
+    for owned in expected:
+        size += len(owned)
+        for key, value in owned.items():
+            if m.get(key) != value:
+                errors.append(f"lost update: {key} is {m.get(key)}, expected {value}")
+    # every increment of a shared key was counted
+    shared = [m.get(f"shared-{j}") or 0 for j in range(SHARED_KEYS)]
+    size += sum(1 for count in shared if count)
+    if sum(shared) != sum(increments):
+        errors.append(f"lost increments: counted {sum(shared)} of {sum(increments)}")
+    if m.get_size() != size or m.get_keys().length() != size:
+        errors.append(f"size is {m.get_size()}, expected {size}")
+    return errors, m
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    ops = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    # switch threads as often as possible to force interleavings
+    sys.setswitchinterval(1e-6)
+    errors, m = stress(threads, ops)
+    print(f"{threads} threads x {ops} ops with concurrent resizes: "
+          f"size {m.get_size()}, capacity {m.get_capacity()}")
+    print("\n".join(errors[:20]) if errors else "no lost updates")
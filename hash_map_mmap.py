@@ -0,0 +1,475 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Hashmap implemented using open addressing with quadratic probing
+#              whose table lives in one flat block of memory, either a
+#              memory-mapped file or a multiprocessing.shared_memory block.
+#              One writer builds the table; any number of processes can then
+#              open it and get()/contains_key() against the same physical
+#              pages, without loading or unpickling anything.
+#              Usage: python hash_map_mmap.py [number of keys] [readers]
+
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from multiprocessing import shared_memory
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+from hash_functions import fnv1a
+
+
+# block layout: header, then capacity fixed width slots, then the arena
+# holding each key and value record the slots point to
+#
+# header: magic, format version, capacity, size, tombstones, arena bytes used
+_HEADER = struct.Struct('<4sIQQQQ')
+_HEADER_SIZE = 64
+_MAGIC = b'HMOA'
+_VERSION = 1
+# slot: hash, key record offset, value record offset, state
+_SLOT = struct.Struct('<QQQB7x')
+_STATE = 24
+# key record: length, UTF-8 bytes; value record: type, length, bytes
+_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<BI')
+_INT = struct.Struct('<q')
+
+_MASK_64 = (1 << 64) - 1
+
+# slot states
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+# value types
+_BYTES = 0
+_STR = 1
+_INT_VALUE = 2
+_NONE = 3
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, path: str = None,
+                 arena_size: int = 1 << 20) -> None:
+        """
+        Create a new, empty table with capacity slots and arena_size bytes
+        for keys and values, and open it for writing. The table is stored
+        in the file at path, or in a new shared memory block if path is
+        None. Keys are strs; values are bytes, str, int or None.
+        The capacity is fixed: put() raises ValueError once it would take
+        the load factor above .5, or when the arena is full. Once live
+        entries and tombstones together would pass half the slots, put()
+        compacts the table in place first.
+        function must return the same hash for a key in every process that
+        opens the table, so Python's builtin hash() can't be used.
+        """
+        capacity = max(capacity, 1)
+        size = _HEADER_SIZE + capacity * _SLOT.size + arena_size
+        self._shm = None
+        self._file = None
+        if path is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+            self._buf = self._shm.buf
+        else:
+            self._file = open(path, 'w+b')
+            self._file.truncate(size)
+            self._mmap = mmap.mmap(self._file.fileno(), size)
+            self._buf = memoryview(self._mmap)
+        self._path = path
+        self._hash_function = function
+        self._writable = True
+        self._capacity = capacity
+        self._arena = _HEADER_SIZE + capacity * _SLOT.size
+        self._arena_size = arena_size
+        self._buf[:self._arena] = bytes(self._arena)
+        _HEADER.pack_into(self._buf, 0, _MAGIC, _VERSION, capacity, 0, 0, 0)
+
+    @classmethod
+    def open(cls, path: str, function, writable: bool = False) -> "HashMap":
+        """
+        Open the table stored in the file at path, read only unless
+        writable is True.
+        """
+        m = cls.__new__(cls)
+        m._shm = None
+        m._file = open(path, 'r+b' if writable else 'rb')
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        m._mmap = mmap.mmap(m._file.fileno(), 0, access=access)
+        m._buf = memoryview(m._mmap)
+        m._path = path
+        m._init_from_header(function, writable)
+        return m
+
+    @classmethod
+    def attach(cls, name: str, function, writable: bool = False) -> "HashMap":
+        """
+        Attach to the table in the shared memory block called name, read
+        only unless writable is True.
+        """
+        m = cls.__new__(cls)
+        m._file = None
+        m._shm = shared_memory.SharedMemory(name=name)
+        m._buf = m._shm.buf if writable else m._shm.buf.toreadonly()
+        m._path = None
+        m._init_from_header(function, writable)
+        return m
+
+    def _init_from_header(self, function, writable: bool) -> None:
+        """
+        Set up an opened table from its header.
+        """
+        magic, version, capacity = _HEADER.unpack_from(self._buf, 0)[:3]
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError("not a hash_map_mmap table")
+        self._hash_function = function
+        self._writable = writable
+        self._capacity = capacity
+        self._arena = _HEADER_SIZE + capacity * _SLOT.size
+        self._arena_size = len(self._buf) - self._arena
+
+    def close(self) -> None:
+        """
+        Close this process's view of the table. The table itself stays.
+        """
+        if self._buf is None:
+            return
+        self._buf.release()
+        self._buf = None
+        if self._shm is not None:
+            self._shm.close()
+        else:
+            self._mmap.close()
+            self._file.close()
+
+    def unlink(self) -> None:
+        """
+        Delete the table once every process has closed it.
+        """
+        if self._shm is not None:
+            self._shm.unlink()
+        else:
+            os.remove(self._path)
+
+    def __enter__(self) -> "HashMap":
+        """Return the map for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Close the map at the end of a with statement."""
+        self.close()
+
+    def get_name(self) -> str:
+        """
+        Return the shared memory block name, or the file path, that other
+        processes pass to attach() or open()
+        """
+        return self._shm.name if self._shm is not None else self._path
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return _HEADER.unpack_from(self._buf, 0)[3]
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _header(self) -> list:
+        """
+        Returns the size, tombstones and arena bytes used.
+        """
+        return list(_HEADER.unpack_from(self._buf, 0)[3:])
+
+    def _set_header(self, size: int, tombstones: int, used: int) -> None:
+        """
+        Write the size, tombstones and arena bytes used.
+        """
+        _HEADER.pack_into(self._buf, 0, _MAGIC, _VERSION, self._capacity,
+                          size, tombstones, used)
+
+    def _key_at(self, offset: int) -> memoryview:
+        """
+        Returns the UTF-8 bytes of the key record at offset.
+        """
+        length = _LENGTH.unpack_from(self._buf, offset)[0]
+        start = offset + _LENGTH.size
+        return self._buf[start:start + length]
+
+    def _value_at(self, offset: int) -> object:
+        """
+        Returns the value in the value record at offset.
+        """
+        kind, length = _VALUE.unpack_from(self._buf, offset)
+        start = offset + _VALUE.size
+        if kind == _STR:
+            return str(self._buf[start:start + length], 'utf-8')
+        if kind == _INT_VALUE:
+            return _INT.unpack_from(self._buf, start)[0]
+        if kind == _NONE:
+            return None
+        return bytes(self._buf[start:start + length])
+
+    def _find(self, data: bytes, hash: int) -> (int, int):
+        """
+        Returns the offset of the slot holding the key whose UTF-8 bytes
+        are data, or -1, and the offset of the slot a new entry for the key
+        would go in: the first tombstone on the probe path, or else the
+        empty slot that ended it. The probe gives up after visiting every
+        slot, returning -1 for the free slot if it found none.
+        """
+        buf, capacity = self._buf, self._capacity
+        index = hash % capacity
+        probe = 1
+        tombstone = -1
+        # capacity quadratic steps, then capacity linear ones cover every slot
+        while probe <= 2 * capacity:
+            offset = _HEADER_SIZE + index * _SLOT.size
+            state = buf[offset + _STATE]
+            if state == EMPTY:
+                return -1, offset if tombstone < 0 else tombstone
+            if state == TOMBSTONE:
+                if tombstone < 0:
+                    tombstone = offset
+            else:
+                slot_hash, key_offset = _SLOT.unpack_from(buf, offset)[:2]
+                if slot_hash == hash and self._key_at(key_offset) == data:
+                    return offset, tombstone
+            if probe < capacity:
+                index = (hash + probe**2) % capacity
+            else:
+                index = (index + 1) % capacity
+            probe += 1
+        return -1, tombstone
+
+    def _append(self, used: int, record: bytes) -> int:
+        """
+        Copies record into the arena after the used bytes and returns
+        its offset.
+        """
+        if used + len(record) > self._arena_size:
+            raise ValueError("arena is full")
+        offset = self._arena + used
+        self._buf[offset:offset + len(record)] = record
+        return offset
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Add key:value or update value if key is in the hashmap. Records
+        are written before the slot that points to them, and the slot's
+        state last, so readers never see a half written entry. The arena
+        space of a replaced value is not reused.
+        """
+        if not self._writable:
+            raise ValueError("table is open read only")
+        if value is None:
+            record = _VALUE.pack(_NONE, 0)
+        elif isinstance(value, int):
+            record = _VALUE.pack(_INT_VALUE, _INT.size) + _INT.pack(value)
+        elif isinstance(value, str):
+            data = value.encode()
+            record = _VALUE.pack(_STR, len(data)) + data
+        else:
+            data = bytes(value)
+            record = _VALUE.pack(_BYTES, len(data)) + data
+        data = key.encode()
+        hash = self._hash_function(key) & _MASK_64
+        size, tombstones, used = self._header()
+        offset, free = self._find(data, hash)
+        # update existing key:value
+        if offset >= 0:
+            value_offset = self._append(used, record)
+            struct.pack_into('<Q', self._buf, offset + 16, value_offset)
+            self._set_header(size, tombstones, used + len(record))
+            return
+        if (size + 1) / self._capacity > .5:
+            raise ValueError("table is full")
+        # tombstones fill slots too; clear them out rather than pass .5
+        if free < 0 or (self._buf[free + _STATE] == EMPTY
+                        and (size + tombstones + 1) / self._capacity > .5):
+            self.compact()
+            tombstones = 0
+            free = self._find(data, hash)[1]
+        key_offset = self._append(used, _LENGTH.pack(len(data)) + data)
+        used += _LENGTH.size + len(data)
+        value_offset = self._append(used, record)
+        used += len(record)
+        # free is the first tombstone on the probe path or an empty slot;
+        # keep its state while the rest of the slot is written, so readers
+        # probing through a tombstone never find an EMPTY mid chain
+        state = self._buf[free + _STATE]
+        if state == TOMBSTONE:
+            tombstones -= 1
+        _SLOT.pack_into(self._buf, free, hash, key_offset, value_offset, state)
+        self._buf[free + _STATE] = LIVE
+        self._set_header(size + 1, tombstones, used)
+
+    def compact(self) -> None:
+        """
+        Rehashes the live entries in place to clear out tombstones. The
+        arena is left as is. Entries move between slots, so a reader in
+        another process may miss keys while this runs.
+        """
+        if not self._writable:
+            raise ValueError("table is open read only")
+        buf, capacity = self._buf, self._capacity
+        live = []
+        for index in range(capacity):
+            offset = _HEADER_SIZE + index * _SLOT.size
+            if buf[offset + _STATE] == LIVE:
+                live.append(_SLOT.unpack_from(buf, offset)[:3])
+        buf[_HEADER_SIZE:self._arena] = bytes(self._arena - _HEADER_SIZE)
+        for hash, key_offset, value_offset in live:
+            index = hash % capacity
+            probe = 1
+            while buf[_HEADER_SIZE + index * _SLOT.size + _STATE] != EMPTY:
+                if probe < capacity:
+                    index = (hash + probe**2) % capacity
+                else:
+                    index = (index + 1) % capacity
+                probe += 1
+            _SLOT.pack_into(buf, _HEADER_SIZE + index * _SLOT.size,
+                            hash, key_offset, value_offset, LIVE)
+        size, tombstones, used = self._header()
+        self._set_header(size, 0, used)
+
+    def table_load(self) -> float:
+        """
+        Returns the table load factor.
+        """
+        return float(self.get_size()/self._capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets.
+        """
+        size, tombstones, used = self._header()
+        return self._capacity - size - tombstones
+
+    def arena_used(self) -> int:
+        """
+        Returns the number of arena bytes taken by key and value records.
+        """
+        return self._header()[2]
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a key.
+        """
+        offset = self._find(key.encode(), self._hash_function(key) & _MASK_64)[0]
+        if offset < 0:
+            return None
+        return self._value_at(_SLOT.unpack_from(self._buf, offset)[2])
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hashmap.
+        """
+        return self._find(key.encode(), self._hash_function(key) & _MASK_64)[0] >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its value from the hashmap, leaving a
+        tombstone. Its arena space is not reused.
+        """
+        if not self._writable:
+            raise ValueError("table is open read only")
+        offset = self._find(key.encode(), self._hash_function(key) & _MASK_64)[0]
+        if offset < 0:
+            return
+        self._buf[offset + _STATE] = TOMBSTONE
+        size, tombstones, used = self._header()
+        self._set_header(size - 1, tombstones + 1, used)
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hashmap, including the arena.
+        """
+        if not self._writable:
+            raise ValueError("table is open read only")
+        self._buf[_HEADER_SIZE:self._arena] = bytes(self._arena - _HEADER_SIZE)
+        self._set_header(0, 0, 0)
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a dynamic array that contains all the keys stored in the hashmap.
+        """
+        result = DynamicArray()
+        for index in range(self._capacity):
+            offset = _HEADER_SIZE + index * _SLOT.size
+            if self._buf[offset + _STATE] == LIVE:
+                key_offset = _SLOT.unpack_from(self._buf, offset)[1]
+                result.append(str(self._key_at(key_offset), 'utf-8'))
+        return result
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def _check_churn() -> None:
+    """
+    Regression check: put and remove a new key on a small table until
+    every slot has held one, then put and get again. Before tombstones
+    counted towards the load and the probe was bounded this hung.
+    """
+    with HashMap(8, fnv1a, arena_size=4096) as m:
+        for i in range(8):
+            m.put('key' + str(i), i)
+            m.remove('key' + str(i))
+        m.put('key8', 8)
+        assert m.get('key8') == 8 and m.get('key0') is None
+        assert m.get_size() == 1 and m.empty_buckets() >= 4
+        m.unlink()
+
+
+def _reader(path: str, keys: list, results) -> None:
+    """
+    Opens the table at path, checks every key reads back as its own
+    value and puts the mean ns per get() on results.
+    """
+    with HashMap.open(path, fnv1a) as m:
+        start = time.perf_counter_ns()
+        for key in keys:
+            if m.get(key) != key:
+                results.put(None)
+                return
+        results.put((time.perf_counter_ns() - start) / len(keys))
+
+
+if __name__ == "__main__":
+    import multiprocessing
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    _check_churn()
+    keys = ['key' + str(i) for i in range(n)]
+    path = os.path.join(tempfile.mkdtemp(), 'table.hm')
+
+    start = time.perf_counter()
+    with HashMap(n * 2 + 1, fnv1a, path, arena_size=n * 32) as m:
+        for key in keys:
+            m.put(key, key)
+        print(f"built {n} keys in {time.perf_counter() - start:.2f}s, "
+              f"{os.path.getsize(path) / n:.1f} bytes/entry on disk")
+
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_reader, args=(path, keys, results))
+                 for _ in range(readers)]
+    for process in processes:
+        process.start()
+    latencies = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    if None in latencies:
+        print("a reader saw a wrong value")
+    else:
+        print(f"{readers} readers sharing one copy, ns/get: "
+              + ", ".join(f"{latency:.0f}" for latency in latencies))
+    os.remove(path)
@@ -6,18 +6,37 @@
 # Description: Hashmap implemented using open addressing with quadratic probing
 #              for collision detection. Contains methods for manipulation of 
 #              data such as add, remove, and get.
+#              Once a probe sequence has taken capacity steps the quadratic
+#              offsets start repeating, so probing continues linearly from
+#              there; this way every slot is reachable and no probe loops
+#              forever.
 
 
+import time
+
 from a6_include import (DynamicArray, HashEntry,
                         hash_function_1, hash_function_2)
+from hash_map_stats import HashMapStats
+import hash_map_snapshot
+
+
+# placeholder left in an old table slot whose entry was migrated
+_MOVED = HashEntry(None, None)
+_MOVED.is_tombstone = True
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function, tombstone_limit: float = .25,
+                 rehash_step: int = None) -> None:
         """
         Initialize new HashMap that uses
-        quadratic probing for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        quadratic probing for collision resolution.
+        tombstone_limit is the fraction of capacity that may be held by
+        tombstones before the table is compacted.
+        If rehash_step is given, resizes are incremental: the old buckets
+        are kept and each put/get/contains_key/remove moves up to
+        rehash_step of them into the new table. Use at least 2 so a
+        migration finishes before the new table needs to grow again.
         """
         self._buckets = DynamicArray()
         for _ in range(capacity):
@@ -26,12 +45,27 @@ class HashMap:
         self._capacity = capacity
         self._hash_function = function
         self._size = 0
+        # dead slots left behind by remove() and the policy for purging them
+        self._tombstones = 0
+        self._tombstone_limit = tombstone_limit
+        self._compactions = 0
+        # old table still being migrated by an incremental resize
+        self._rehash_step = rehash_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._rehash_index = 0
+        # live entries still in the old table, counted in _size
+        self._old_size = 0
+        # bumped on every structural change, checked by iterators
+        self._version = 0
+        # HashMapStats collector, None unless enable_stats() was called
+        self._stats = None
 
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
+        self._finish_rehash()
         out = ''
         for i in range(self._buckets.length()):
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
@@ -60,25 +94,175 @@ class HashMap:
         # resize before adding if needed.
         if self.table_load() >= .5:
             self.resize_table(self._capacity * 2)
+        # probe chains clogged with tombstones, rehash in place
+        elif self.effective_load() >= .5 or \
+                self._tombstones > self._tombstone_limit * self._capacity:
+            # grow instead if compacting would leave the table nearly full
+            if self.table_load() >= .25:
+                self.resize_table(self._capacity * 2)
+            else:
+                self.compact()
         hash = self._hash_function(key)
-        index = hash % self._capacity
+        # key not migrated yet, update it in the old table
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+            if self._old_buckets is not None:
+                entry = self._probe(self._old_buckets, self._old_capacity, key, hash)
+                if entry is not None:
+                    entry.value = value
+                    if self._stats is not None:
+                        self._stats.record('put', True)
+                    return
+        self._insert(key, value, hash)
+
+    def _insert(self, key: str, value: object, hash: int) -> None:
+        """
+        Add key:value to the current table or update it if the key is
+        already there. Does not check the load factor.
+        """
+        capacity = self._capacity
+        index = hash % capacity
         probe = 1
-        # probe for empty bucket to add
+        tombstone = None
+        # probe for existing key or empty bucket to add
         while self._buckets[index] is not None:
-            # reach tombstone value
-            if self._buckets[index].is_tombstone == True:
-                self._buckets[index] = HashEntry(key, value)
-                self._size += 1
-                return
+            entry = self._buckets[index]
+            # remember first tombstone so it can be reused
+            if entry.is_tombstone:
+                if tombstone is None:
+                    tombstone = index
             # update existing key:value
-            if self._buckets[index].key == key:
-                self._buckets[index].value = value
+            elif entry.hash == hash and entry.key == key:
+                entry.value = value
+                if self._stats is not None:
+                    self._stats.add_probes(probe)
+                    self._stats.record('put', True)
                 return
-            index = (hash + probe**2) % self._capacity
+            if probe < capacity:
+                index = (hash + probe**2) % capacity
+            else:
+                index = (index + 1) % capacity
             probe += 1
-        # empty bucket, add key:value
-        self._buckets[index] = HashEntry(key, value)
+        # key not found, add key:value in first free bucket
+        if tombstone is not None:
+            index = tombstone
+            self._tombstones -= 1
+        self._buckets[index] = HashEntry(key, value, hash)
         self._size += 1
+        self._version += 1
+        if self._stats is not None:
+            self._stats.add_probes(probe)
+            self._stats.record('put', False)
+
+    def put_many(self, items, size_hint: int = None) -> None:
+        """
+        Add every key:value pair in items, updating keys already in the
+        hashmap. The table is resized at most once, up front, for
+        len(items) (or size_hint if items has no length) new keys, so the
+        load factor isn't checked on every insert. Without a length or
+        hint this is the same as calling put() for each pair.
+        """
+        count = len(items) if hasattr(items, '__len__') else size_hint
+        if count is None:
+            for key, value in items:
+                self.put(key, value)
+            return
+        self._finish_rehash()
+        # grow (or compact) once for all of the new keys
+        new_capacity = self.capacity_for(count)
+        if new_capacity is not None:
+            self.resize_table(new_capacity)
+            self._finish_rehash()
+        # fall back to put() if items turns out longer than promised
+        limit = self._capacity / 2 - self._tombstones
+        hash_function, insert = self._hash_function, self._insert
+        for key, value in items:
+            if self._size < limit:
+                insert(key, value, hash_function(key))
+            else:
+                self.put(key, value)
+
+    @classmethod
+    def from_items(cls, items, function, size_hint: int = None, **options) -> "HashMap":
+        """
+        Returns a new HashMap holding the key:value pairs in items, created
+        with enough capacity that loading it never resizes. options are
+        passed on to the constructor.
+        """
+        count = len(items) if hasattr(items, '__len__') else size_hint
+        m = cls(2 * count + 1 if count else 1, function, **options)
+        m.put_many(items, size_hint)
+        return m
+
+    def save(self, path: str, block_size: int = 1 << 16) -> None:
+        """
+        Writes the hashmap to a binary snapshot file at path, storing each
+        entry's slot and cached hash. Tombstones are kept too, since the
+        probe sequences of the entries after them depend on them. Entries
+        are written block_size at a time.
+        """
+        self._finish_rehash()
+
+        def records():
+            for index in range(self._capacity):
+                entry = self._buckets[index]
+                if entry is None:
+                    continue
+                if entry.is_tombstone:
+                    yield index, 0, None, None
+                else:
+                    yield index, entry.hash, entry.key, entry.value
+
+        hash_map_snapshot.write(path, hash_map_snapshot.OA, self._capacity,
+                                self._size + self._tombstones, self._hash_function,
+                                records(), block_size)
+
+    @classmethod
+    def load(cls, path: str, function, stream: bool = False, use_mmap: bool = False,
+             **options) -> "HashMap":
+        """
+        Returns a new HashMap read from the snapshot file at path, with
+        every entry put straight back in its saved slot, so nothing is
+        hashed or probed. function is only called to check it is the one
+        the map was saved with. stream reads the file one block at a time
+        and use_mmap memory-maps it, instead of reading it all at once.
+        options are passed on to the constructor.
+        """
+        capacity, count, blocks = hash_map_snapshot.read(
+            path, hash_map_snapshot.OA, function, stream, use_mmap)
+        m = cls(capacity, function, **options)
+        buckets = m._buckets
+        for slots, hashes, keys, values in blocks:
+            for index, hash, key, value in zip(slots, hashes, keys, values):
+                entry = HashEntry(key, value, hash)
+                if key is None:
+                    entry.is_tombstone = True
+                    m._tombstones += 1
+                buckets[index] = entry
+        m._size = count - m._tombstones
+        return m
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array with the value of each key in keys,
+        or None for keys not in the hashmap.
+        """
+        result = DynamicArray()
+        find, hash_function = self._find, self._hash_function
+        for key in keys:
+            entry = find(key, hash_function(key))
+            if self._stats is not None:
+                self._stats.record('get', entry is not None)
+            result.append(None if entry is None else entry.value)
+        return result
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys and its value from the hashmap.
+        """
+        remove = self.remove
+        for key in keys:
+            remove(key)
 
     def table_load(self) -> float:
         """
@@ -86,109 +270,370 @@ class HashMap:
         """
         return float(self._size/self._capacity)
 
+    def effective_load(self) -> float:
+        """
+        Returns the load factor counting both live entries and tombstones.
+        """
+        return float((self._size + self._tombstones)/self._capacity)
+
+    def get_tombstones(self) -> int:
+        """
+        Returns the number of tombstones in the table.
+        """
+        return self._tombstones
+
+    def get_compactions(self) -> int:
+        """
+        Returns the number of times the table was compacted.
+        """
+        return self._compactions
+
     def empty_buckets(self) -> int:
         """
-        Returns the number of empty buckets.
+        Returns the number of empty buckets in the current table. Buckets
+        holding a tombstone are not empty. During an incremental resize,
+        entries not migrated yet don't fill a bucket, and the migration
+        is left to run at its own pace.
+        """
+        return self._capacity - (self._size - self._old_size) - self._tombstones
+
+    def stats(self) -> dict:
+        """
+        Returns the size, capacity, tombstone and empty bucket counts and
+        load factors of the hashmap. Bucket counts are those of the current
+        table; pending_rehash is the number of old buckets an incremental
+        resize still has to move into it.
         """
-        return self._capacity - self._size
+        occupied = self._size - self._old_size + self._tombstones
+        pending = 0
+        if self._old_buckets is not None:
+            pending = self._old_capacity - self._rehash_index
+        return {
+            'size': self._size,
+            'capacity': self._capacity,
+            'tombstones': self._tombstones,
+            'occupied_buckets': occupied,
+            'empty_buckets': self._capacity - occupied,
+            'pending_rehash': pending,
+            'table_load': self.table_load(),
+            'effective_load': self.effective_load(),
+        }
 
     def resize_table(self, new_capacity: int) -> None:
         """
         Change the capacity of the hashmap keeping all pre-existing
-        key value pairs.
+        key value pairs. Entries are moved using their cached hashes,
+        so the hash function is not called again.
         """
         # non valid new capacity
         if new_capacity < 1 or new_capacity < self._size:
             return
-        # new hash for storing key value pairs
-        new_hash = HashMap(new_capacity, self._hash_function)
-        for index in range(self._capacity):
-            # add valid key:value
-            if self._buckets[index] is not None and self._buckets[index].is_tombstone == False:
-                new_hash.put(self._buckets[index].key, self._buckets[index].value)
-        # set self to new data
-        self._buckets = new_hash._buckets
-        self._capacity = new_hash._capacity
+        if self._stats is not None:
+            start, old_capacity = time.perf_counter(), self._capacity
+        # only one incremental resize runs at a time
+        self._finish_rehash()
+        self._version += 1
+        # grow until the entries fit below the .5 load limit
+        while self._size > 0 and (self._size - 1) / new_capacity >= .5:
+            new_capacity *= 2
+        new_buckets = DynamicArray([None] * new_capacity)
+        old_buckets, old_capacity = self._buckets, self._capacity
+        # set self to new data, tombstones are not carried over
+        self._buckets = new_buckets
+        self._capacity = new_capacity
+        self._tombstones = 0
+        self._old_buckets = old_buckets
+        self._old_capacity = old_capacity
+        self._rehash_index = 0
+        self._old_size = self._size
+        # stop-the-world resize moves everything now
+        if self._rehash_step is None:
+            self._finish_rehash()
+        if self._stats is not None:
+            self._stats.record_resize(old_capacity, new_capacity, self._size,
+                                      time.perf_counter() - start)
+
+    def _migrate(self, count: int) -> None:
+        """
+        Moves the entries in up to count slots of the old table into the
+        current one while a resize is in progress. Moved slots are left
+        as tombstones so the old table's probe sequences stay intact.
+        """
+        old_buckets, buckets = self._old_buckets, self._buckets
+        capacity = self._capacity
+        stop = min(self._rehash_index + count, self._old_capacity)
+        for index in range(self._rehash_index, stop):
+            entry = old_buckets[index]
+            # move valid key:value
+            if entry is not None and not entry.is_tombstone:
+                hash = entry.hash
+                new_index = hash % capacity
+                probe = 1
+                while buckets[new_index] is not None and not buckets[new_index].is_tombstone:
+                    if probe < capacity:
+                        new_index = (hash + probe**2) % capacity
+                    else:
+                        new_index = (new_index + 1) % capacity
+                    probe += 1
+                if buckets[new_index] is not None:
+                    self._tombstones -= 1
+                buckets[new_index] = entry
+                old_buckets[index] = _MOVED
+                self._old_size -= 1
+        self._rehash_index = stop
+        # every slot moved, drop the old table
+        if stop == self._old_capacity:
+            self._old_buckets = None
+
+    def _finish_rehash(self) -> None:
+        """
+        Completes an incremental resize, if one is in progress.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
 
-    def get(self, key: str) -> object:
+    def compact(self) -> None:
         """
-        Returns the value associated with a key.
+        Rehashes the table at its current capacity to clear out tombstones.
         """
-        hash = self._hash_function(key)
-        index = hash % self._capacity
+        self.resize_table(self._capacity)
+        self._compactions += 1
+
+    def _probe(self, buckets: DynamicArray, capacity: int, key: str, hash: int) -> HashEntry:
+        """
+        Returns the live entry holding key in buckets, or None.
+        """
+        index = hash % capacity
         probe = 1
-        if self._buckets[index] is None:
-            return None
-        # probe for given key
-        while self._buckets[index] is not None:
-            if self._buckets[index].key == key:
-                # if key is tombstone
-                if self._buckets[index].is_tombstone == True:
-                    return None
-                return self._buckets[index].value
+        # probe for given key, skipping tombstones
+        while buckets[index] is not None:
+            entry = buckets[index]
+            if not entry.is_tombstone and entry.hash == hash and entry.key == key:
+                if self._stats is not None:
+                    self._stats.add_probes(probe)
+                return entry
             # continue probe
-            index = (hash + probe**2) % self._capacity
+            if probe < capacity:
+                index = (hash + probe**2) % capacity
+            else:
+                index = (index + 1) % capacity
             probe += 1
+        if self._stats is not None:
+            self._stats.add_probes(probe)
         return None
-            
+
+    def probe_lengths(self, keys) -> list:
+        """
+        Returns the number of buckets a lookup of each key in keys examines,
+        following the same probe sequence as _probe(). A missing key counts
+        the buckets up to the empty one ending its probe, and a key an
+        incremental resize hasn't moved yet adds its probe of the old table.
+        """
+        lengths = []
+        tables = [(self._buckets, self._capacity)]
+        if self._old_buckets is not None:
+            tables.append((self._old_buckets, self._old_capacity))
+        for key in keys:
+            hash = self._hash_function(key)
+            total = 0
+            for buckets, capacity in tables:
+                index = hash % capacity
+                probe = 1
+                found = False
+                while buckets[index] is not None:
+                    entry = buckets[index]
+                    if not entry.is_tombstone and entry.hash == hash and entry.key == key:
+                        found = True
+                        break
+                    if probe < capacity:
+                        index = (hash + probe**2) % capacity
+                    else:
+                        index = (index + 1) % capacity
+                    probe += 1
+                total += probe
+                if found:
+                    break
+            lengths.append(total)
+        return lengths
+
+    def _find(self, key: str, hash: int) -> HashEntry:
+        """
+        Returns the live entry holding key in either table, or None.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+        entry = self._probe(self._buckets, self._capacity, key, hash)
+        if entry is None and self._old_buckets is not None:
+            entry = self._probe(self._old_buckets, self._old_capacity, key, hash)
+        return entry
+
+    def rehash_pending(self) -> bool:
+        """
+        Returns True while an incremental resize has old buckets left to
+        move into the current table.
+        """
+        return self._old_buckets is not None
+
+    def rehash_step(self, count: int) -> None:
+        """
+        Moves the entries in up to count old buckets into the current
+        table if an incremental resize is in progress, so a caller can
+        finish one in steps of its own size.
+        """
+        if self._old_buckets is not None:
+            self._migrate(count)
+
+    def capacity_for(self, count: int) -> int:
+        """
+        Returns the capacity the table must be resized to before count new
+        keys go in to stay below a .5 load, or None if it can take them
+        as it is. A table short of room only because of tombstones gets
+        its own capacity, so the resize clears them.
+        """
+        needed, capacity = self._size + count, self._capacity
+        if (needed + self._tombstones) / capacity < .5:
+            return None
+        while needed / capacity >= .5:
+            capacity *= 2
+        return capacity
+
+    def bucket_items(self, start: int, stop: int) -> list:
+        """
+        Returns the (key, value) pairs in buckets start to stop of the
+        current table. Keys an incremental resize hasn't moved yet are
+        not included.
+        """
+        buckets = self._buckets
+        result = []
+        for index in range(start, stop):
+            entry = buckets[index]
+            if entry is not None and not entry.is_tombstone:
+                result.append((entry.key, entry.value))
+        return result
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a key.
+        """
+        entry = self._find(key, self._hash_function(key))
+        if self._stats is not None:
+            self._stats.record('get', entry is not None)
+        if entry is None:
+            return None
+        return entry.value
+
     def contains_key(self, key: str) -> bool:
         """
         Returns True if the given key is in the hashmap.
         """
-        hash = self._hash_function(key)
-        index = hash % self._capacity
-        probe = 1
-        if self._buckets[index] is None:
-            return False
-        # probe for given key
-        while self._buckets[index] is not None:
-            if self._buckets[index].key == key:
-                # if key is tombstone
-                if self._buckets[index].is_tombstone == True:
-                    return False
-                return True
-            # continue probe
-            index = (hash + probe**2) % self._capacity
-            probe += 1
-        return False
+        entry = self._find(key, self._hash_function(key))
+        if self._stats is not None:
+            self._stats.record('contains_key', entry is not None)
+        return entry is not None
+
+    def enable_stats(self) -> HashMapStats:
+        """
+        Start collecting probe length, hit/miss and resize statistics,
+        and return the collector.
+        """
+        if self._stats is None:
+            self._stats = HashMapStats()
+        return self._stats
+
+    def disable_stats(self) -> None:
+        """
+        Stop collecting statistics.
+        """
+        self._stats = None
+
+    def get_stats(self) -> dict:
+        """
+        Returns a snapshot of the collected statistics, or None if
+        statistics aren't enabled.
+        """
+        return None if self._stats is None else self._stats.snapshot()
 
     def remove(self, key: str) -> None:
         """
         Removes the given key and its value from the hashmap.
         """
         hash = self._hash_function(key)
-        index = hash % self._capacity
-        probe = 1
-        if self._buckets[index] is None:
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+        entry = self._probe(self._buckets, self._capacity, key, hash)
+        if entry is not None:
+            self._tombstones += 1
+        # old table tombstones are dropped by the migration, not counted
+        elif self._old_buckets is not None:
+            entry = self._probe(self._old_buckets, self._old_capacity, key, hash)
+            if entry is not None:
+                self._old_size -= 1
+        if self._stats is not None:
+            self._stats.record('remove', entry is not None)
+        if entry is None:
             return
-        # probe for key
-        while self._buckets[index] is not None:
-            if self._buckets[index].key == key:
-                # if key is already tombstone
-                if self._buckets[index].is_tombstone == True:
-                    return
-                # set key to tombstone value
-                self._buckets[index].is_tombstone = True
-                self._size -= 1
-                return
-            # continue probe
-            index = (hash + probe**2) % self._capacity
-            probe += 1
+        # set key to tombstone value
+        entry.is_tombstone = True
+        self._size -= 1
+        self._version += 1
 
     def clear(self) -> None:
         """
         Clears the contents of the hashmap.
         """
-        new_arr = DynamicArray()
-        for _ in range(self._capacity):
-            new_arr.append(None)
-        self._buckets = new_arr
+        self._buckets = DynamicArray([None] * self._capacity)
         self._size = 0
+        self._version += 1
+        self._tombstones = 0
+        self._old_buckets = None
+        self._old_size = 0
+
+    def _entries(self):
+        """
+        Generator yielding every live entry in the hashmap in bucket order.
+        Raises RuntimeError if the map is changed (other than updating a
+        value) while it is being iterated.
+        """
+        self._finish_rehash()
+        version, buckets = self._version, self._buckets
+        for index in range(self._capacity):
+            entry = buckets[index]
+            if entry is not None and not entry.is_tombstone:
+                if self._version != version:
+                    raise RuntimeError("HashMap changed during iteration")
+                yield entry
+        if self._version != version:
+            raise RuntimeError("HashMap changed during iteration")
+
+    def __iter__(self):
+        """
+        Iterate over the keys in the hashmap.
+        """
+        return self.keys()
+
+    def keys(self):
+        """
+        Returns a generator over the keys in the hashmap.
+        """
+        return (entry.key for entry in self._entries())
+
+    def values(self):
+        """
+        Returns a generator over the values in the hashmap.
+        """
+        return (entry.value for entry in self._entries())
+
+    def items(self):
+        """
+        Returns a generator over the (key, value) pairs in the hashmap.
+        """
+        return ((entry.key, entry.value) for entry in self._entries())
 
     def get_keys(self) -> DynamicArray:
         """
         Returns a dynamic array that contains all the keys stored in the hashmap.
         """
+        self._finish_rehash()
         result = DynamicArray()
         for index in range(self._capacity):
             if self._buckets[index] is not None and self._buckets[index].is_tombstone == False:
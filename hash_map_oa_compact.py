@@ -0,0 +1,386 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Hashmap implemented using open addressing with quadratic probing
+#              in the compact layout of CPython's dict: the probed table is an
+#              array of small integers, each EMPTY, DUMMY (a tombstone) or the
+#              position of an entry in dense, insertion ordered entry lists.
+#              An empty slot costs 1 to 8 bytes instead of a list pointer,
+#              iteration and get_keys() only visit the entries, and a resize
+#              only rebuilds the index. Same interface as hash_map_oa.HashMap,
+#              using the same probe sequence, and keys come back in
+#              insertion order.
+#              Usage: python hash_map_oa_compact.py [number of keys]
+
+
+import sys
+import time
+import tracemalloc
+from array import array
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+
+
+# index slot values other than an entry position
+EMPTY = -1
+DUMMY = -2
+# left in an entry's key once it is removed, until the entries are compacted
+_DELETED = object()
+
+
+def _index_typecode(capacity: int) -> str:
+    """
+    Returns the smallest signed array typecode that can hold every entry
+    position of a table with capacity slots, as well as EMPTY and DUMMY.
+    """
+    for typecode in ('b', 'h', 'i'):
+        if capacity <= 1 << (array(typecode).itemsize * 8 - 1):
+            return typecode
+    return 'q'
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, tombstone_limit: float = .25) -> None:
+        """
+        Initialize new HashMap that uses quadratic probing for collision
+        resolution. _indices has one slot per unit of capacity, and entry
+        i is _hashes[i], _keys[i] and _values[i]. A removed entry leaves a
+        DUMMY in its slot and a hole in the entries, both cleared when the
+        table is compacted or resized.
+        """
+        self._capacity = capacity
+        self._indices = array(_index_typecode(capacity), [EMPTY]) * capacity
+        self._hashes = []
+        self._keys = []
+        self._values = []
+
+        self._hash_function = function
+        self._size = 0
+        # DUMMY slots in the index, and holes left in the entry lists; a
+        # put() can reuse a DUMMY slot but always appends its entry
+        self._dummies = 0
+        self._holes = 0
+        self._tombstone_limit = tombstone_limit
+        self._compactions = 0
+        # bumped on every structural change, checked by iterators
+        self._version = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output, one line
+        per entry in insertion order.
+        """
+        out = ''
+        for key, value in self.items():
+            out += f"K: {key} V: {value}\n"
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash: int) -> int:
+        """
+        Returns the index slot pointing at key's entry, or -1 if the key
+        is not in the map.
+        """
+        indices, hashes, keys = self._indices, self._hashes, self._keys
+        capacity = self._capacity
+        slot = hash % capacity
+        probe = 1
+        # probe for given key, skipping DUMMY slots
+        while indices[slot] != EMPTY:
+            entry = indices[slot]
+            if entry >= 0 and hashes[entry] == hash and keys[entry] == key:
+                return slot
+            if probe < capacity:
+                slot = (hash + probe**2) % capacity
+            else:
+                slot = (slot + 1) % capacity
+            probe += 1
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Add key:value or update value if key is in the hashmap.
+        """
+        # resize before adding if needed.
+        if self.table_load() >= .5:
+            self.resize_table(self._capacity * 2)
+        # probe chains clogged with tombstones or the entries filling up
+        # with holes, rehash in place. A put() reusing a DUMMY slot still
+        # appends, so the entries may never outgrow the capacity the index
+        # typecode was sized for.
+        elif self.effective_load() >= .5 or \
+                self._holes > self._tombstone_limit * self._capacity or \
+                len(self._keys) >= self._capacity:
+            # grow instead if compacting would leave the table nearly full
+            if self.table_load() >= .25:
+                self.resize_table(self._capacity * 2)
+            else:
+                self.compact()
+        indices, hashes, keys = self._indices, self._hashes, self._keys
+        capacity = self._capacity
+        hash = self._hash_function(key)
+        slot = hash % capacity
+        probe = 1
+        dummy = -1
+        # probe for existing key or empty slot to add
+        while indices[slot] != EMPTY:
+            entry = indices[slot]
+            if entry == DUMMY:
+                # remember first DUMMY so its slot can be reused
+                if dummy < 0:
+                    dummy = slot
+            elif hashes[entry] == hash and keys[entry] == key:
+                # update existing key:value
+                self._values[entry] = value
+                return
+            if probe < capacity:
+                slot = (hash + probe**2) % capacity
+            else:
+                slot = (slot + 1) % capacity
+            probe += 1
+        # key not found, append the entry and point the first free slot at it
+        if dummy >= 0:
+            slot = dummy
+            self._dummies -= 1
+        indices[slot] = len(keys)
+        hashes.append(hash)
+        keys.append(key)
+        self._values.append(value)
+        self._size += 1
+        self._version += 1
+
+    def table_load(self) -> float:
+        """
+        Returns the table load factor.
+        """
+        return float(self._size/self._capacity)
+
+    def effective_load(self) -> float:
+        """
+        Returns the load factor counting both live entries and tombstones.
+        """
+        return float((self._size + self._dummies)/self._capacity)
+
+    def get_tombstones(self) -> int:
+        """
+        Returns the number of tombstones (DUMMY slots) in the table.
+        """
+        return self._dummies
+
+    def get_compactions(self) -> int:
+        """
+        Returns the number of times the table was compacted.
+        """
+        return self._compactions
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets. Buckets holding a tombstone
+        are not empty.
+        """
+        return self._capacity - self._size - self._dummies
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the hashmap keeping all pre-existing
+        key value pairs. Only the index is rebuilt, from the cached
+        hashes; the entries are just closed up if some were removed.
+        """
+        # non valid new capacity
+        if new_capacity < 1 or new_capacity < self._size:
+            return
+        # grow until the entries fit below the .5 load limit
+        while self._size > 0 and (self._size - 1) / new_capacity >= .5:
+            new_capacity *= 2
+        self._version += 1
+        # close up the holes left by removed entries, keeping their order
+        if self._holes:
+            keys = self._keys
+            live = [i for i in range(len(keys)) if keys[i] is not _DELETED]
+            self._hashes = [self._hashes[i] for i in live]
+            self._keys = [keys[i] for i in live]
+            self._values = [self._values[i] for i in live]
+        indices = array(_index_typecode(new_capacity), [EMPTY]) * new_capacity
+        for entry, hash in enumerate(self._hashes):
+            slot = hash % new_capacity
+            probe = 1
+            while indices[slot] != EMPTY:
+                if probe < new_capacity:
+                    slot = (hash + probe**2) % new_capacity
+                else:
+                    slot = (slot + 1) % new_capacity
+                probe += 1
+            indices[slot] = entry
+        # tombstones are not carried over
+        self._indices = indices
+        self._capacity = new_capacity
+        self._dummies = 0
+        self._holes = 0
+
+    def compact(self) -> None:
+        """
+        Rehashes the table at its current capacity to clear out tombstones.
+        """
+        self.resize_table(self._capacity)
+        self._compactions += 1
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a key.
+        """
+        slot = self._find(key, self._hash_function(key))
+        if slot < 0:
+            return None
+        return self._values[self._indices[slot]]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hashmap.
+        """
+        return self._find(key, self._hash_function(key)) >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its value from the hashmap.
+        """
+        slot = self._find(key, self._hash_function(key))
+        if slot < 0:
+            return
+        # leave a DUMMY slot and a hole, dropping references to key and value
+        entry = self._indices[slot]
+        self._indices[slot] = DUMMY
+        self._keys[entry] = _DELETED
+        self._values[entry] = None
+        self._size -= 1
+        self._dummies += 1
+        self._holes += 1
+        self._version += 1
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hashmap.
+        """
+        self._indices = array(self._indices.typecode, [EMPTY]) * self._capacity
+        self._hashes = []
+        self._keys = []
+        self._values = []
+        self._size = 0
+        self._dummies = 0
+        self._holes = 0
+        self._version += 1
+
+    def _entries(self):
+        """
+        Generator yielding the position of every live entry in insertion
+        order. Raises RuntimeError if the map is changed (other than
+        updating a value) while it is being iterated.
+        """
+        version, keys = self._version, self._keys
+        for entry in range(len(keys)):
+            if keys[entry] is not _DELETED:
+                if self._version != version:
+                    raise RuntimeError("HashMap changed during iteration")
+                yield entry
+        if self._version != version:
+            raise RuntimeError("HashMap changed during iteration")
+
+    def __iter__(self):
+        """
+        Iterate over the keys in the hashmap.
+        """
+        return self.keys()
+
+    def keys(self):
+        """
+        Returns a generator over the keys in the hashmap, in insertion order.
+        """
+        return (self._keys[entry] for entry in self._entries())
+
+    def values(self):
+        """
+        Returns a generator over the values in the hashmap, in insertion order.
+        """
+        return (self._values[entry] for entry in self._entries())
+
+    def items(self):
+        """
+        Returns a generator over the (key, value) pairs in the hashmap, in
+        insertion order.
+        """
+        return ((self._keys[entry], self._values[entry]) for entry in self._entries())
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a dynamic array that contains all the keys stored in the
+        hashmap, in insertion order.
+        """
+        if not self._holes:
+            return DynamicArray(self._keys)
+        return DynamicArray([key for key in self._keys if key is not _DELETED])
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def _ns_per_key(function, n: int) -> float:
+    """Returns the ns function takes, divided by n."""
+    start = time.perf_counter_ns()
+    function()
+    return (time.perf_counter_ns() - start) / n
+
+
+def _check_churn() -> None:
+    """
+    Regression check: put and remove the same key many times on a small
+    table. Before holes triggered a compaction this overflowed the 'b'
+    index typecode at the 128th put, and the entries grew without bound.
+    """
+    m = HashMap(16, hash)
+    for i in range(1000):
+        m.put('a', i)
+        m.remove('a')
+    m.put('a', 1000)
+    assert m.get('a') == 1000 and m.get_size() == 1
+    assert len(m._keys) <= m.get_capacity()
+
+
+if __name__ == "__main__":
+    # python hash_map_oa_compact.py [number of keys]
+    import hash_map_oa
+    import hash_map_oa_flat
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    _check_churn()
+    keys = ['key' + str(i) for i in range(n)]
+    print(f"{n} keys, then every other one removed; ns per key except memory")
+    print(f"{'map':>8} {'bytes/entry':>12} {'put':>6} {'get':>6} {'get_keys':>9} "
+          f"{'removed get_keys':>17} {'resize':>7}")
+    for name, map_class in (("HashEntry", hash_map_oa.HashMap), ("flat", hash_map_oa_flat.HashMap),
+                            ("compact", HashMap)):
+        tracemalloc.start()
+        m = map_class(16, hash)
+        for key in keys:
+            m.put(key, key)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        m = map_class(16, hash)
+        put = _ns_per_key(lambda: [m.put(key, key) for key in keys], n)
+        get = _ns_per_key(lambda: [m.get(key) for key in keys], n)
+        scan = _ns_per_key(m.get_keys, n)
+        for key in keys[::2]:
+            m.remove(key)
+        sparse = _ns_per_key(m.get_keys, n // 2)
+        resize = _ns_per_key(lambda: m.resize_table(m.get_capacity() * 2), n // 2)
+        print(f"{name:>8} {memory / n:>12.1f} {put:>6.0f} {get:>6.0f} {scan:>9.0f} "
+              f"{sparse:>17.0f} {resize:>7.0f}")
@@ -0,0 +1,290 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Hashmap implemented using open addressing with quadratic probing,
+#              storing slots in flat parallel arrays instead of HashEntry
+#              objects. Same interface as hash_map_oa.HashMap.
+#              Uses the same probe sequence as hash_map_oa.
+
+
+import sys
+import time
+import tracemalloc
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+
+
+# slot states kept in the _states bytearray
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, tombstone_limit: float = .25) -> None:
+        """
+        Initialize new HashMap that uses quadratic probing for collision
+        resolution. Slot i is described by _states[i], _hashes[i], _keys[i]
+        and _values[i], so no per-slot entry object is allocated.
+        """
+        self._states = bytearray(capacity)
+        self._hashes = [0] * capacity
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+
+        self._capacity = capacity
+        self._hash_function = function
+        self._size = 0
+        self._tombstones = 0
+        self._tombstone_limit = tombstone_limit
+        self._compactions = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output.
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._states[i] == EMPTY:
+                slot = 'None'
+            else:
+                slot = f"K: {self._keys[i]} V: {self._values[i]} " \
+                       f"TS: {self._states[i] == TOMBSTONE}"
+            out += str(i) + ': ' + slot + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash: int) -> int:
+        """
+        Returns the slot holding key, or -1 if the key is not in the map.
+        """
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        index = hash % capacity
+        probe = 1
+        # probe for given key, skipping tombstones
+        while states[index] != EMPTY:
+            if states[index] == LIVE and hashes[index] == hash and keys[index] == key:
+                return index
+            if probe < capacity:
+                index = (hash + probe**2) % capacity
+            else:
+                index = (index + 1) % capacity
+            probe += 1
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Add key:value or update value if key is in the hashmap.
+        """
+        # resize before adding if needed.
+        if self.table_load() >= .5:
+            self.resize_table(self._capacity * 2)
+        # probe chains clogged with tombstones, rehash in place
+        elif self.effective_load() >= .5 or \
+                self._tombstones > self._tombstone_limit * self._capacity:
+            # grow instead if compacting would leave the table nearly full
+            if self.table_load() >= .25:
+                self.resize_table(self._capacity * 2)
+            else:
+                self.compact()
+        states, hashes, keys = self._states, self._hashes, self._keys
+        capacity = self._capacity
+        hash = self._hash_function(key)
+        index = hash % capacity
+        probe = 1
+        tombstone = -1
+        # probe for existing key or empty slot to add
+        while states[index] != EMPTY:
+            if states[index] == TOMBSTONE:
+                # remember first tombstone so it can be reused
+                if tombstone < 0:
+                    tombstone = index
+            elif hashes[index] == hash and keys[index] == key:
+                # update existing key:value
+                self._values[index] = value
+                return
+            if probe < capacity:
+                index = (hash + probe**2) % capacity
+            else:
+                index = (index + 1) % capacity
+            probe += 1
+        # key not found, add key:value in first free slot
+        if tombstone >= 0:
+            index = tombstone
+            self._tombstones -= 1
+        states[index] = LIVE
+        hashes[index] = hash
+        keys[index] = key
+        self._values[index] = value
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Returns the table load factor.
+        """
+        return float(self._size/self._capacity)
+
+    def effective_load(self) -> float:
+        """
+        Returns the load factor counting both live entries and tombstones.
+        """
+        return float((self._size + self._tombstones)/self._capacity)
+
+    def get_tombstones(self) -> int:
+        """
+        Returns the number of tombstones in the table.
+        """
+        return self._tombstones
+
+    def get_compactions(self) -> int:
+        """
+        Returns the number of times the table was compacted.
+        """
+        return self._compactions
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets. Buckets holding a tombstone
+        are not empty.
+        """
+        return self._capacity - self._size - self._tombstones
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the hashmap keeping all pre-existing
+        key value pairs. Cached hashes are reused, so the hash function
+        is not called again.
+        """
+        # non valid new capacity
+        if new_capacity < 1 or new_capacity < self._size:
+            return
+        # grow until the entries fit below the .5 load limit
+        while self._size > 0 and (self._size - 1) / new_capacity >= .5:
+            new_capacity *= 2
+        old_states, old_hashes = self._states, self._hashes
+        old_keys, old_values = self._keys, self._values
+        states = bytearray(new_capacity)
+        hashes = [0] * new_capacity
+        keys = [None] * new_capacity
+        values = [None] * new_capacity
+        for old in range(self._capacity):
+            if old_states[old] != LIVE:
+                continue
+            hash = old_hashes[old]
+            index = hash % new_capacity
+            probe = 1
+            while states[index] != EMPTY:
+                if probe < new_capacity:
+                    index = (hash + probe**2) % new_capacity
+                else:
+                    index = (index + 1) % new_capacity
+                probe += 1
+            states[index] = LIVE
+            hashes[index] = hash
+            keys[index] = old_keys[old]
+            values[index] = old_values[old]
+        # set self to new data, tombstones are not carried over
+        self._states, self._hashes = states, hashes
+        self._keys, self._values = keys, values
+        self._capacity = new_capacity
+        self._tombstones = 0
+
+    def compact(self) -> None:
+        """
+        Rehashes the table at its current capacity to clear out tombstones.
+        """
+        self.resize_table(self._capacity)
+        self._compactions += 1
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a key.
+        """
+        index = self._find(key, self._hash_function(key))
+        if index < 0:
+            return None
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hashmap.
+        """
+        return self._find(key, self._hash_function(key)) >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its value from the hashmap.
+        """
+        index = self._find(key, self._hash_function(key))
+        if index < 0:
+            return
+        # set slot to tombstone, drop references to key and value
+        self._states[index] = TOMBSTONE
+        self._keys[index] = None
+        self._values[index] = None
+        self._size -= 1
+        self._tombstones += 1
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hashmap.
+        """
+        self._states = bytearray(self._capacity)
+        self._hashes = [0] * self._capacity
+        self._keys = [None] * self._capacity
+        self._values = [None] * self._capacity
+        self._size = 0
+        self._tombstones = 0
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a dynamic array that contains all the keys stored in the hashmap.
+        """
+        result = DynamicArray()
+        for index in range(self._capacity):
+            if self._states[index] == LIVE:
+                result.append(self._keys[index])
+        return result
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def _measure(map_class, keys: list) -> (int, float):
+    """
+    Builds a map from keys and returns the bytes it allocated
+    and the mean ns per get().
+    """
+    tracemalloc.start()
+    m = map_class(len(keys) * 2 + 1, hash)
+    for key in keys:
+        m.put(key, key)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter_ns()
+    for key in keys:
+        m.get(key)
+    return memory, (time.perf_counter_ns() - start) / len(keys)
+
+
+if __name__ == "__main__":
+    # python hash_map_oa_flat.py [number of keys]
+    import hash_map_oa
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    keys = ['key' + str(i) for i in range(n)]
+    for name, map_class in (("HashEntry", hash_map_oa.HashMap), ("flat", HashMap)):
+        memory, latency = _measure(map_class, keys)
+        print(f"{name:>9}: {memory / n:7.1f} bytes/entry, {latency:7.1f} ns/get")
@@ -0,0 +1,265 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Hashmap implemented using open addressing with Robin Hood
+#              linear probing and backward-shift deletion, so no tombstones
+#              are needed and the table can run at a high load factor.
+#              Same interface as hash_map_oa.HashMap.
+
+
+import sys
+import time
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+
+
+# _dists value marking an empty slot
+EMPTY = -1
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, max_load: float = .85) -> None:
+        """
+        Initialize new HashMap that uses Robin Hood linear probing for
+        collision resolution. Slot i holds _keys[i], _values[i], the key's
+        cached hash _hashes[i] and _dists[i], how far the slot is from the
+        key's home slot (EMPTY if the slot is free). The table doubles
+        before a put() would take the load factor above max_load.
+        """
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be between 0 and 1")
+        capacity = max(capacity, 1)
+        self._dists = [EMPTY] * capacity
+        self._hashes = [0] * capacity
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+
+        self._capacity = capacity
+        self._hash_function = function
+        self._size = 0
+        self._max_load = max_load
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output.
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._dists[i] == EMPTY:
+                slot = 'None'
+            else:
+                slot = f"K: {self._keys[i]} V: {self._values[i]} D: {self._dists[i]}"
+            out += str(i) + ': ' + slot + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash: int) -> int:
+        """
+        Returns the slot holding key, or -1 if the key is not in the map.
+        The search stops as soon as it reaches a slot whose entry is closer
+        to its home than key would be, since key can't be past that point.
+        """
+        dists, hashes, keys = self._dists, self._hashes, self._keys
+        capacity = self._capacity
+        index = hash % capacity
+        dist = 0
+        while dists[index] >= dist:
+            if hashes[index] == hash and keys[index] == key:
+                return index
+            index = (index + 1) % capacity
+            dist += 1
+        return -1
+
+    def _place(self, key: str, value: object, hash: int) -> None:
+        """
+        Add a key known not to be in the table, taking the slot of any
+        entry closer to its home than the one being placed.
+        """
+        dists, hashes, keys, values = self._dists, self._hashes, self._keys, self._values
+        capacity = self._capacity
+        index = hash % capacity
+        dist = 0
+        while dists[index] != EMPTY:
+            # poorer entry takes the slot, richer one moves on
+            if dists[index] < dist:
+                dist, dists[index] = dists[index], dist
+                hash, hashes[index] = hashes[index], hash
+                key, keys[index] = keys[index], key
+                value, values[index] = values[index], value
+            index = (index + 1) % capacity
+            dist += 1
+        dists[index] = dist
+        hashes[index] = hash
+        keys[index] = key
+        values[index] = value
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Add key:value or update value if key is in the hashmap.
+        """
+        hash = self._hash_function(key)
+        index = self._find(key, hash)
+        # update existing key:value
+        if index >= 0:
+            self._values[index] = value
+            return
+        # resize before adding if needed.
+        if (self._size + 1) / self._capacity > self._max_load:
+            self.resize_table(self._capacity * 2)
+        self._place(key, value, hash)
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Returns the table load factor.
+        """
+        return float(self._size/self._capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets.
+        """
+        return self._capacity - self._size
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the hashmap keeping all pre-existing
+        key value pairs. Cached hashes are reused, so the hash function
+        is not called again.
+        """
+        # non valid new capacity
+        if new_capacity < 1 or new_capacity < self._size:
+            return
+        # grow until the entries fit under the load limit
+        while self._size / new_capacity > self._max_load:
+            new_capacity *= 2
+        old = zip(self._dists, self._hashes, self._keys, self._values)
+        self._dists = [EMPTY] * new_capacity
+        self._hashes = [0] * new_capacity
+        self._keys = [None] * new_capacity
+        self._values = [None] * new_capacity
+        self._capacity = new_capacity
+        for dist, hash, key, value in old:
+            if dist != EMPTY:
+                self._place(key, value, hash)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a key.
+        """
+        index = self._find(key, self._hash_function(key))
+        if index < 0:
+            return None
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hashmap.
+        """
+        return self._find(key, self._hash_function(key)) >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its value from the hashmap. The entries
+        after it in the probe run are shifted back one slot, so no
+        tombstone is left behind.
+        """
+        index = self._find(key, self._hash_function(key))
+        if index < 0:
+            return
+        dists, hashes, keys, values = self._dists, self._hashes, self._keys, self._values
+        capacity = self._capacity
+        following = (index + 1) % capacity
+        # shift back until an empty slot or an entry already at home
+        while dists[following] > 0:
+            dists[index] = dists[following] - 1
+            hashes[index] = hashes[following]
+            keys[index] = keys[following]
+            values[index] = values[following]
+            index, following = following, (following + 1) % capacity
+        dists[index] = EMPTY
+        keys[index] = None
+        values[index] = None
+        self._size -= 1
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hashmap.
+        """
+        self._dists = [EMPTY] * self._capacity
+        self._hashes = [0] * self._capacity
+        self._keys = [None] * self._capacity
+        self._values = [None] * self._capacity
+        self._size = 0
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a dynamic array that contains all the keys stored in the hashmap.
+        """
+        result = DynamicArray()
+        for index in range(self._capacity):
+            if self._dists[index] != EMPTY:
+                result.append(self._keys[index])
+        return result
+
+    def probe_stats(self) -> dict:
+        """
+        Returns the histogram of probe lengths (slots examined to find a
+        key -> number of keys), and the mean and longest probe length.
+        """
+        histogram = {}
+        for dist in self._dists:
+            if dist != EMPTY:
+                histogram[dist + 1] = histogram.get(dist + 1, 0) + 1
+        total = sum(length * count for length, count in histogram.items())
+        return {
+            'histogram': dict(sorted(histogram.items())),
+            'mean': total / self._size if self._size else 0.0,
+            'max': max(histogram) if histogram else 0,
+        }
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def _time_gets(m, keys: list) -> float:
+    """Returns the mean ns per get() of keys."""
+    start = time.perf_counter_ns()
+    for key in keys:
+        m.get(key)
+    return (time.perf_counter_ns() - start) / len(keys)
+
+
+if __name__ == "__main__":
+    # python hash_map_rh.py [number of keys]
+    import hash_map_oa
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    keys = ['key' + str(i) for i in range(n)]
+    misses = ['miss' + str(i) for i in range(n)]
+
+    oa = hash_map_oa.HashMap(16, hash)
+    rh = HashMap(16, hash, max_load=.9)
+    for key in keys:
+        oa.put(key, key)
+        rh.put(key, key)
+
+    oa_lengths = oa.probe_lengths(keys)
+    rh_stats = rh.probe_stats()
+    print(f"{n} keys, probe length = slots examined per successful lookup")
+    print(f"{'map':>10} {'load':>6} {'mean probe':>11} {'max probe':>10} {'hit ns':>8} {'miss ns':>8}")
+    print(f"{'quadratic':>10} {oa.table_load():>6.2f} {sum(oa_lengths) / n:>11.2f} "
+          f"{max(oa_lengths):>10} {_time_gets(oa, keys):>8.0f} {_time_gets(oa, misses):>8.0f}")
+    print(f"{'robin hood':>10} {rh.table_load():>6.2f} {rh_stats['mean']:>11.2f} "
+          f"{rh_stats['max']:>10} {_time_gets(rh, keys):>8.0f} {_time_gets(rh, misses):>8.0f}")
@@ -8,30 +8,78 @@
 #              data such as add, remove, and get.
 
 
-from a6_include import (DynamicArray, LinkedList,
+import heapq
+import time
+
+from a6_include import (DynamicArray, LinkedList, SLNode,
                         hash_function_1, hash_function_2)
+from hash_map_stats import HashMapStats
+import hash_map_snapshot
+
+
+class _EmptyBucket(LinkedList):
+    """
+    LinkedList shared by every bucket with no nodes, replaced by a new
+    LinkedList on the bucket's first insert. Pickles and copies as a
+    reference to _EMPTY, so a copied map still recognizes its empty buckets.
+    """
+
+    __slots__ = ()
+
+    def __reduce__(self) -> str:
+        """Pickle as the module level _EMPTY."""
+        return '_EMPTY'
+
+
+_EMPTY = _EmptyBucket()
 
 
 class HashMap:
-    def __init__(self, capacity: int, function) -> None:
+    def __init__(self, capacity: int, function, grow_load: float = 1.0,
+                 shrink_load: float = None, rehash_step: int = None) -> None:
         """
         Initialize new HashMap that uses
-        separate chaining for collision resolution
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        separate chaining for collision resolution.
+        The table doubles when put() pushes the load factor above
+        grow_load. grow_load None keeps the capacity fixed, as the
+        assignment examples below expect.
+        If shrink_load is given, the table halves (never below the
+        starting capacity) when remove() drops the load factor below it.
+        shrink_load must be less than half of grow_load so a resize in
+        one direction can't immediately trigger the other.
+        If rehash_step is given, resizes are incremental: the old buckets
+        are kept and each put/get/contains_key/remove moves up to
+        rehash_step of them into the new table, instead of rehashing
+        everything at once.
         """
-        self._buckets = DynamicArray()
-        for _ in range(capacity):
-            self._buckets.append(LinkedList())
+        if grow_load is not None and shrink_load is not None \
+                and shrink_load * 2 >= grow_load:
+            raise ValueError("shrink_load must be less than half of grow_load")
+        self._buckets = DynamicArray([_EMPTY] * capacity)
 
         self._capacity = capacity
         self._hash_function = function
         self._size = 0
+        self._grow_load = grow_load
+        self._shrink_load = shrink_load
+        self._min_capacity = capacity
+        # old table still being migrated by an incremental resize
+        self._rehash_step = rehash_step
+        self._old_buckets = None
+        self._old_capacity = 0
+        self._rehash_index = 0
+        # bumped on every structural change, checked by iterators
+        self._version = 0
+        # HashMapStats collector, None unless enable_stats() was called
+        self._stats = None
+        # number of non-empty buckets in the current table
+        self._occupied = 0
 
     def __str__(self) -> str:
         """
         Override string method to provide more readable output
-        DO NOT CHANGE THIS METHOD IN ANY WAY
         """
+        self._finish_rehash()
         out = ''
         for i in range(self._buckets.length()):
             out += str(i) + ': ' + str(self._buckets[i]) + '\n'
@@ -53,30 +101,302 @@ class HashMap:
 
     # ------------------------------------------------------------------ #
 
+    def _migrate(self, count: int) -> None:
+        """
+        Moves up to count buckets of the old table into the current one
+        while an incremental resize is in progress.
+        """
+        stop = min(self._rehash_index + count, self._old_capacity)
+        old_buckets = self._old_buckets
+        for bucket in range(self._rehash_index, stop):
+            # the nodes themselves are relinked, not copied
+            for node in old_buckets[bucket]:
+                self._chain(node.hash % self._capacity).insert_node(node)
+            # free the old LinkedList now rather than all at once at the end
+            old_buckets[bucket] = _EMPTY
+        self._rehash_index = stop
+        # every bucket moved, drop the old table
+        if stop == self._old_capacity:
+            self._old_buckets = None
+
+    def _finish_rehash(self) -> None:
+        """
+        Completes an incremental resize, if one is in progress.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._old_capacity)
+
+    def _chain(self, index: int) -> LinkedList:
+        """
+        Returns the current table's bucket at index to insert into,
+        replacing the shared empty bucket with a new LinkedList first.
+        """
+        bucket = self._buckets[index]
+        if bucket is _EMPTY:
+            bucket = LinkedList()
+            self._buckets[index] = bucket
+            self._occupied += 1
+        return bucket
+
+    def _old_bucket(self, hash: int) -> LinkedList:
+        """
+        Returns the old table's bucket for hash if it hasn't been
+        migrated yet, otherwise None.
+        """
+        if self._old_buckets is None:
+            return None
+        index = hash % self._old_capacity
+        if index < self._rehash_index:
+            return None
+        return self._old_buckets[index]
+
+    def _find(self, key: str, hash: int):
+        """
+        Returns the node holding key in either table, or None.
+        """
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+        bucket = self._buckets[hash % self._capacity]
+        if self._stats is not None:
+            self._stats.add_probes(_visited(bucket, key, hash))
+        node = bucket.contains(key, hash)
+        if node is None:
+            old = self._old_bucket(hash)
+            if old is not None:
+                if self._stats is not None:
+                    self._stats.add_probes(_visited(old, key, hash))
+                node = old.contains(key, hash)
+        return node
+
+    def enable_stats(self) -> HashMapStats:
+        """
+        Start collecting chain length, hit/miss and resize statistics,
+        and return the collector.
+        """
+        if self._stats is None:
+            self._stats = HashMapStats()
+        return self._stats
+
+    def disable_stats(self) -> None:
+        """
+        Stop collecting statistics.
+        """
+        self._stats = None
+
+    def get_stats(self) -> dict:
+        """
+        Returns a snapshot of the collected statistics, or None if
+        statistics aren't enabled.
+        """
+        return None if self._stats is None else self._stats.snapshot()
+
     def put(self, key: str, value: object) -> None:
         """
         Add a key:value pair to the hash map. If the key already exists,
         update the value to the new value.
         """
-        index = (self._hash_function(key) % self._capacity)
+        hash = self._hash_function(key)
+        node = self._find(key, hash)
+        if self._stats is not None:
+            self._stats.record('put', node is not None)
         # if key not in hashmap, add key:value
-        if self._buckets[index].contains(key) is None:
-            self._buckets[index].insert(key, value)
-            self._size += 1
+        if node is None:
+            self._add(key, value, hash)
         # if key in hashmap, update value
         else:
-            self._buckets[index].contains(key).value = value
+            node.value = value
+
+    def _add(self, key: str, value: object, hash: int) -> None:
+        """
+        Insert a key known not to be in the hash map, growing the table
+        afterwards if the load passes grow_load.
+        """
+        self._chain(hash % self._capacity).insert(key, value, hash)
+        self._size += 1
+        self._version += 1
+        # grow once the load passes the threshold
+        if self._grow_load is not None and self.table_load() > self._grow_load:
+            self.resize_table(self._capacity * 2)
+
+    def get_node(self, key: str, hash: int = None) -> SLNode:
+        """
+        Returns the node holding key, whose value can be read or replaced
+        in place, or None if key is not in the hash map. hash, if given,
+        is the hash function's result for key and saves computing it again.
+        """
+        if hash is None:
+            hash = self._hash_function(key)
+        node = self._find(key, hash)
+        if self._stats is not None:
+            self._stats.record('get', node is not None)
+        return node
+
+    def add(self, key: str, value: object, hash: int = None) -> None:
+        """
+        Add key:value for a key known not to be in the hash map, e.g. just
+        after get_node() returned None, without looking it up again. hash,
+        if given, is the hash function's result for key.
+        """
+        if hash is None:
+            hash = self._hash_function(key)
+        if self._stats is not None:
+            self._stats.record('put', False)
+        self._add(key, value, hash)
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """
+        Add amount to the value stored for key, treating a missing key as
+        0, and return the new value. The key is hashed and looked up once.
+        """
+        hash = self._hash_function(key)
+        node = self._find(key, hash)
+        if self._stats is not None:
+            self._stats.record('increment', node is not None)
+        if node is None:
+            self._add(key, amount, hash)
+            return amount
+        node.value += amount
+        return node.value
+
+    def put_many(self, items, size_hint: int = None) -> None:
+        """
+        Add every key:value pair in items, updating keys already in the
+        hash map. When grow_load is set the table is resized at most once,
+        up front, for len(items) (or size_hint if items has no length) new
+        keys, instead of checking the load on every insert. Past that
+        many, or without a length or hint, this is the same as calling
+        put() for each pair.
+        """
+        count = len(items) if hasattr(items, '__len__') else size_hint
+        if count is None:
+            for key, value in items:
+                self.put(key, value)
+            return
+        self._finish_rehash()
+        # grow once for all of the new keys
+        new_capacity = self.capacity_for(count)
+        if new_capacity is not None:
+            self.resize_table(new_capacity)
+            self._finish_rehash()
+        buckets, capacity = self._buckets, self._capacity
+        hash_function = self._hash_function
+        # fall back to put() if items turns out longer than promised
+        limit = float('inf') if self._grow_load is None else capacity * self._grow_load
+        for key, value in items:
+            if self._size >= limit:
+                self.put(key, value)
+                continue
+            hash = hash_function(key)
+            index = hash % capacity
+            node = buckets[index].contains(key, hash)
+            if node is None:
+                self._chain(index).insert(key, value, hash)
+                self._size += 1
+                self._version += 1
+            else:
+                node.value = value
+
+    @classmethod
+    def from_items(cls, items, function, size_hint: int = None, **options) -> "HashMap":
+        """
+        Returns a new HashMap holding the key:value pairs in items, created
+        with one bucket per pair (or enough to stay under grow_load).
+        options are passed on to the constructor.
+        """
+        count = len(items) if hasattr(items, '__len__') else size_hint
+        capacity = count or 1
+        grow_load = options.get('grow_load', 1.0)
+        if grow_load is not None:
+            capacity = int(capacity / grow_load) + 1
+        m = cls(capacity, function, **options)
+        m.put_many(items, size_hint)
+        return m
+
+    def save(self, path: str, block_size: int = 1 << 16) -> None:
+        """
+        Writes the hash map to a binary snapshot file at path, storing each
+        key's cached hash. Entries are written block_size at a time.
+        """
+        self._finish_rehash()
+
+        def records():
+            for bucket in range(self._capacity):
+                # tail first, so loading rebuilds each chain in order
+                for node in reversed(list(self._buckets[bucket])):
+                    yield None, node.hash, node.key, node.value
+
+        hash_map_snapshot.write(path, hash_map_snapshot.SC, self._capacity, self._size,
+                                self._hash_function, records(), block_size)
+
+    @classmethod
+    def load(cls, path: str, function, stream: bool = False, use_mmap: bool = False,
+             **options) -> "HashMap":
+        """
+        Returns a new HashMap read from the snapshot file at path, with the
+        saved capacity and bucket layout. The stored hashes are used, so
+        function is only called to check it is the one the map was saved
+        with. stream reads the file one block at a time and use_mmap
+        memory-maps it, instead of reading it all at once.
+        options are passed on to the constructor.
+        """
+        capacity, count, blocks = hash_map_snapshot.read(
+            path, hash_map_snapshot.SC, function, stream, use_mmap)
+        m = cls(capacity, function, **options)
+        chain = m._chain
+        for _, hashes, keys, values in blocks:
+            for hash, key, value in zip(hashes, keys, values):
+                chain(hash % capacity).insert(key, value, hash)
+        m._size = count
+        return m
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array with the value of each key in keys,
+        or None for keys not in the hash map.
+        """
+        result = DynamicArray()
+        find, hash_function = self._find, self._hash_function
+        for key in keys:
+            node = find(key, hash_function(key))
+            if self._stats is not None:
+                self._stats.record('get', node is not None)
+            result.append(None if node is None else node.value)
+        return result
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys and its value from the hash map.
+        """
+        remove = self.remove
+        for key in keys:
+            remove(key)
 
     def empty_buckets(self) -> int:
         """
-        Returns the number of empty buckets.
+        Returns the number of empty buckets in the current table. During an
+        incremental resize, nodes not migrated yet don't fill a bucket, and
+        the migration is left to run at its own pace.
         """
-        # counter for number of not empty buckets
-        size = 0
-        for bucket in range(self._capacity):
-            if self._buckets[bucket].length() > 0:
-                size += 1
-        return self._capacity - size
+        return self._capacity - self._occupied
+
+    def stats(self) -> dict:
+        """
+        Returns the size, capacity, occupied and empty bucket counts and
+        load factor of the hash map. Bucket counts are those of the current
+        table; pending_rehash is the number of old buckets an incremental
+        resize still has to move into it.
+        """
+        pending = 0
+        if self._old_buckets is not None:
+            pending = self._old_capacity - self._rehash_index
+        return {
+            'size': self._size,
+            'capacity': self._capacity,
+            'occupied_buckets': self._occupied,
+            'empty_buckets': self._capacity - self._occupied,
+            'pending_rehash': pending,
+            'table_load': self.table_load(),
+        }
 
     def table_load(self) -> float:
         """
@@ -88,39 +408,97 @@ class HashMap:
         """
         Clears the hash map.
         """
-        # set each bucket to empty linked list
-        for index in range(self._capacity):
-            self._buckets[index] = LinkedList()
+        # set each bucket to the shared empty bucket
+        self._buckets = DynamicArray([_EMPTY] * self._capacity)
         self._size = 0
+        self._version += 1
+        self._old_buckets = None
+        self._occupied = 0
 
     def resize_table(self, new_capacity: int) -> None:
         """
         Resizes the hash map by creating a new dynamic array with new size,
-        copies all old key:values to new array.
+        and moves all old nodes to new array using their cached hashes.
         """
         if new_capacity < 1:
             return
         else:
-            # create new dynamic array with empty linked lists
-            new_arr = DynamicArray()
-            for _ in range(new_capacity):
-                new_arr.append(LinkedList())
-            # copy original values into new dynamic array
-            for bucket in range(self._capacity):
-                for node in self._buckets[bucket]:
-                    index = (self._hash_function(node.key) % new_capacity)
-                    new_arr[index].insert(node.key, node.value)
-            # set hashmap to new data
-            self._buckets = new_arr
+            if self._stats is not None:
+                start = time.perf_counter()
+            # only one incremental resize runs at a time
+            self._finish_rehash()
+            self._version += 1
+            # set hashmap to new dynamic array of empty buckets
+            old_buckets, old_capacity = self._buckets, self._capacity
+            self._buckets = DynamicArray([_EMPTY] * new_capacity)
             self._capacity = new_capacity
+            self._occupied = 0
+            if self._rehash_step is not None:
+                # leave the old buckets to be migrated by later operations
+                self._old_buckets = old_buckets
+                self._old_capacity = old_capacity
+                self._rehash_index = 0
+            else:
+                # relink original nodes into new dynamic array
+                for bucket in range(old_capacity):
+                    for node in old_buckets[bucket]:
+                        self._chain(node.hash % new_capacity).insert_node(node)
+            if self._stats is not None:
+                self._stats.record_resize(old_capacity, new_capacity, self._size,
+                                          time.perf_counter() - start)
+
+    def rehash_pending(self) -> bool:
+        """
+        Returns True while an incremental resize has old buckets left to
+        move into the current table.
+        """
+        return self._old_buckets is not None
+
+    def rehash_step(self, count: int) -> None:
+        """
+        Moves up to count old buckets into the current table if an
+        incremental resize is in progress, so a caller can finish one in
+        steps of its own size.
+        """
+        if self._old_buckets is not None:
+            self._migrate(count)
+
+    def capacity_for(self, count: int) -> int:
+        """
+        Returns the capacity the table must be resized to before count new
+        keys go in to stay within grow_load, or None if it can take them
+        as it is or grow_load is None.
+        """
+        if self._grow_load is None:
+            return None
+        needed, capacity = self._size + count, self._capacity
+        if needed / capacity <= self._grow_load:
+            return None
+        while needed / capacity > self._grow_load:
+            capacity *= 2
+        return capacity
+
+    def bucket_items(self, start: int, stop: int) -> list:
+        """
+        Returns the (key, value) pairs in buckets start to stop of the
+        current table. Keys an incremental resize hasn't moved yet are
+        not included.
+        """
+        buckets = self._buckets
+        result = []
+        for index in range(start, stop):
+            for node in buckets[index]:
+                result.append((node.key, node.value))
+        return result
 
     def get(self, key: str) -> object:
         """
         returns the value associated with the given key.
         """
         # find key
-        index = (self._hash_function(key) % self._capacity)
-        result = self._buckets[index].contains(key)
+        result = self._find(key, self._hash_function(key))
+        if self._stats is not None:
+            self._stats.record('get', result is not None)
         # if key in hashmap
         if result != None:
             return result.value
@@ -134,26 +512,97 @@ class HashMap:
         if self._size == 0:
             return False
         # find key in hashmap
-        index = (self._hash_function(key) % self._capacity)
-        result = self._buckets[index].contains(key)
+        result = self._find(key, self._hash_function(key))
+        if self._stats is not None:
+            self._stats.record('contains_key', result is not None)
         # if key in hashmap
         if result != None:
             return True
         # key not in hashmap
         return False
 
-    def remove(self, key: str) -> None:
+    def remove(self, key: str, hash: int = None) -> None:
+        """
+        Removes the key and its value from the tree. hash, if given, is
+        the hash function's result for key.
+        """
+        self._remove(key, self._hash_function(key) if hash is None else hash)
+
+    def _remove(self, key: str, hash: int) -> None:
         """
-        Removes the key and its value from the tree.
+        Removes key, whose hash is already known, from the hash map.
         """
-        index = (self._hash_function(key) % self._capacity)
-        if self._buckets[index].remove(key):
+        if self._old_buckets is not None:
+            self._migrate(self._rehash_step)
+        index = hash % self._capacity
+        bucket = self._buckets[index]
+        if self._stats is not None:
+            self._stats.add_probes(_visited(bucket, key, hash))
+        removed = bucket.remove(key, hash)
+        # give the emptied bucket's LinkedList back
+        if removed and bucket.length() == 0:
+            self._buckets[index] = _EMPTY
+            self._occupied -= 1
+        if not removed:
+            old = self._old_bucket(hash)
+            if old is not None and self._stats is not None:
+                self._stats.add_probes(_visited(old, key, hash))
+            removed = old is not None and old.remove(key, hash)
+        if self._stats is not None:
+            self._stats.record('remove', removed)
+        if removed:
             self._size -= 1
+            self._version += 1
+            # shrink once the load drops under the threshold
+            if self._shrink_load is not None and self._capacity > self._min_capacity \
+                    and self.table_load() < self._shrink_load:
+                self.resize_table(max(self._capacity // 2, self._min_capacity))
         
+    def _nodes(self):
+        """
+        Generator yielding every node in the hash map in bucket order.
+        Raises RuntimeError if the map is changed (other than updating a
+        value) while it is being iterated.
+        """
+        self._finish_rehash()
+        version, buckets = self._version, self._buckets
+        for bucket in range(self._capacity):
+            for node in buckets[bucket]:
+                if self._version != version:
+                    raise RuntimeError("HashMap changed during iteration")
+                yield node
+        if self._version != version:
+            raise RuntimeError("HashMap changed during iteration")
+
+    def __iter__(self):
+        """
+        Iterate over the keys in the hash map.
+        """
+        return self.keys()
+
+    def keys(self):
+        """
+        Returns a generator over the keys in the hash map.
+        """
+        return (node.key for node in self._nodes())
+
+    def values(self):
+        """
+        Returns a generator over the values in the hash map.
+        """
+        return (node.value for node in self._nodes())
+
+    def items(self):
+        """
+        Returns a generator over the (key, value) pairs in the hash map.
+        """
+        return ((node.key, node.value) for node in self._nodes())
+
     def get_keys(self) -> DynamicArray:
         """
         Get all keys in the Hashmap and return them in a dynamic array.
         """
+        self._finish_rehash()
         result = DynamicArray()
         for bucket in range(self._capacity):
             for node in self._buckets[bucket]:
@@ -161,40 +610,55 @@ class HashMap:
         return result
 
 
-def find_mode(da: DynamicArray) -> (DynamicArray, int):
+def _visited(bucket: LinkedList, key: str, hash: int) -> int:
+    """
+    Returns the number of nodes a lookup of key in bucket examines.
+    Only used when statistics are enabled.
+    """
+    count = 0
+    for node in bucket:
+        count += 1
+        if node.hash == hash and node.key == key:
+            break
+    return count
+
+
+def find_mode(values) -> (DynamicArray, int):
     """
     Finds the most frequent value(s) and the frequency of occurence.
-    Returns a tuple of the dynamic array and the freq.
+    values can be a DynamicArray or any other iterable, including a
+    generator too large to hold in memory; it is read once.
+    Returns a tuple of the dynamic array and the freq. Values tied for
+    the mode are listed in the order they reached that frequency.
     """
     mode = DynamicArray()
     freq = 0
-    # new hashmap to track values and their freq
-    map = HashMap(da.length() // 3, hash_function_1)
-    for index in range(da.length()):
-        # if value in hashmap, +1 to the freq
-        if map.contains_key(da[index]):
-            node = map.get(da[index]) + 1
-            map.put(da[index], node) 
-        # if value not in hashmap, add value and freq of 1
-        else:
-            map.put(da[index], 1)
-    # cycle through the keys in the hashmap
-    keys = map.get_keys()
-    for index in range(keys.length()):
-        # freq value
-        node = map.get(keys[index])
-        # if current key freq greater than highest freq
-        if node > freq:
-            # new array and add new high values
+    # new hashmap to track values and their freq, grows with the input
+    map = HashMap(16, hash_function_1)
+    for value in values:
+        count = map.increment(value)
+        # new highest freq, start a new array of modes
+        if count > freq:
             mode = DynamicArray()
-            mode.append(keys[index])
-            freq = node
-        # if current key freq equal to high freq
-        elif node == freq:
-            mode.append(keys[index])
+            mode.append(value)
+            freq = count
+        # value just caught up with the highest freq
+        elif count == freq:
+            mode.append(value)
     return (mode, freq)
 
 
+def find_top_k(values, k: int) -> DynamicArray:
+    """
+    Returns a dynamic array of the k most frequent values as
+    (value, freq) tuples, most frequent first. Like find_mode, values
+    can be any iterable and is read once. Only a heap of k entries is
+    kept while selecting from the counts.
+    """
+    map = HashMap(16, hash_function_1)
+    for value in values:
+        map.increment(value)
+    return DynamicArray(heapq.nlargest(k, map.items(), key=lambda item: item[1]))
 
 
 # ------------------- BASIC TESTING ---------------------------------------- #
@@ -203,7 +667,7 @@ if __name__ == "__main__":
 
     print("\nPDF - put example 1")
     print("-------------------")
-    m = HashMap(50, hash_function_1)
+    m = HashMap(50, hash_function_1, grow_load=None)
     for i in range(150):
         m.put('str' + str(i), i * 100)
         if i % 25 == 24:
@@ -211,7 +675,7 @@ if __name__ == "__main__":
 
     print("\nPDF - put example 2")
     print("-------------------")
-    m = HashMap(40, hash_function_2)
+    m = HashMap(40, hash_function_2, grow_load=None)
     for i in range(50):
         m.put('str' + str(i // 3), i * 100)
         if i % 10 == 9:
@@ -219,7 +683,7 @@ if __name__ == "__main__":
 
     print("\nPDF - empty_buckets example 1")
     print("-----------------------------")
-    m = HashMap(100, hash_function_1)
+    m = HashMap(100, hash_function_1, grow_load=None)
     print(m.empty_buckets(), m.get_size(), m.get_capacity())
     m.put('key1', 10)
     print(m.empty_buckets(), m.get_size(), m.get_capacity())
@@ -232,7 +696,7 @@ if __name__ == "__main__":
 
     print("\nPDF - empty_buckets example 2")
     print("-----------------------------")
-    m = HashMap(50, hash_function_1)
+    m = HashMap(50, hash_function_1, grow_load=None)
     for i in range(150):
         m.put('key' + str(i), i * 100)
         if i % 30 == 0:
@@ -240,7 +704,7 @@ if __name__ == "__main__":
 
     print("\nPDF - table_load example 1")
     print("--------------------------")
-    m = HashMap(100, hash_function_1)
+    m = HashMap(100, hash_function_1, grow_load=None)
     print(m.table_load())
     m.put('key1', 10)
     print(m.table_load())
@@ -251,7 +715,7 @@ if __name__ == "__main__":
 
     print("\nPDF - table_load example 2")
     print("--------------------------")
-    m = HashMap(50, hash_function_1)
+    m = HashMap(50, hash_function_1, grow_load=None)
     for i in range(50):
         m.put('key' + str(i), i * 100)
         if i % 10 == 0:
@@ -259,7 +723,7 @@ if __name__ == "__main__":
 
     print("\nPDF - clear example 1")
     print("---------------------")
-    m = HashMap(100, hash_function_1)
+    m = HashMap(100, hash_function_1, grow_load=None)
     print(m.get_size(), m.get_capacity())
     m.put('key1', 10)
     m.put('key2', 20)
@@ -270,7 +734,7 @@ if __name__ == "__main__":
 
     print("\nPDF - clear example 2")
     print("---------------------")
-    m = HashMap(50, hash_function_1)
+    m = HashMap(50, hash_function_1, grow_load=None)
     print(m.get_size(), m.get_capacity())
     m.put('key1', 10)
     print(m.get_size(), m.get_capacity())
@@ -283,7 +747,7 @@ if __name__ == "__main__":
 
     print("\nPDF - resize example 1")
     print("----------------------")
-    m = HashMap(20, hash_function_1)
+    m = HashMap(20, hash_function_1, grow_load=None)
     m.put('key1', 10)
     print(m.get_size(), m.get_capacity(), m.get('key1'), m.contains_key('key1'))
     m.resize_table(30)
@@ -291,7 +755,7 @@ if __name__ == "__main__":
 
     print("\nPDF - resize example 2")
     print("----------------------")
-    m = HashMap(75, hash_function_2)
+    m = HashMap(75, hash_function_2, grow_load=None)
     keys = [i for i in range(1, 1000, 13)]
     for key in keys:
         m.put(str(key), key * 42)
@@ -313,14 +777,14 @@ if __name__ == "__main__":
 
     print("\nPDF - get example 1")
     print("-------------------")
-    m = HashMap(30, hash_function_1)
+    m = HashMap(30, hash_function_1, grow_load=None)
     print(m.get('key'))
     m.put('key1', 10)
     print(m.get('key1'))
 
     print("\nPDF - get example 2")
     print("-------------------")
-    m = HashMap(150, hash_function_2)
+    m = HashMap(150, hash_function_2, grow_load=None)
     for i in range(200, 300, 7):
         m.put(str(i), i * 10)
     print(m.get_size(), m.get_capacity())
@@ -330,7 +794,7 @@ if __name__ == "__main__":
 
     print("\nPDF - contains_key example 1")
     print("----------------------------")
-    m = HashMap(10, hash_function_1)
+    m = HashMap(10, hash_function_1, grow_load=None)
     print(m.contains_key('key1'))
     m.put('key1', 10)
     m.put('key2', 20)
@@ -344,7 +808,7 @@ if __name__ == "__main__":
 
     print("\nPDF - contains_key example 2")
     print("----------------------------")
-    m = HashMap(75, hash_function_2)
+    m = HashMap(75, hash_function_2, grow_load=None)
     keys = [i for i in range(1, 1000, 20)]
     for key in keys:
         m.put(str(key), key * 42)
@@ -359,7 +823,7 @@ if __name__ == "__main__":
 
     print("\nPDF - remove example 1")
     print("----------------------")
-    m = HashMap(50, hash_function_1)
+    m = HashMap(50, hash_function_1, grow_load=None)
     print(m.get('key1'))
     m.put('key1', 10)
     print(m.get('key1'))
@@ -369,7 +833,7 @@ if __name__ == "__main__":
 
     print("\nPDF - get_keys example 1")
     print("------------------------")
-    m = HashMap(10, hash_function_2)
+    m = HashMap(10, hash_function_2, grow_load=None)
     for i in range(100, 200, 10):
         m.put(str(i), str(i * 10))
     print(m.get_keys())
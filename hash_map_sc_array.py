@@ -0,0 +1,278 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Hashmap implemented using separate chaining where each bucket
+#              is one flat list of [hash, key, value, hash, key, value, ...]
+#              instead of a LinkedList of SLNodes, so a chain is scanned in
+#              a single loop over contiguous memory. Same interface as
+#              hash_map_sc.HashMap, without incremental resizing.
+
+
+import sys
+import time
+import tracemalloc
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+
+
+# each entry takes three consecutive items of its bucket: hash, key, value
+STRIDE = 3
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, grow_load: float = 1.0,
+                 shrink_load: float = None) -> None:
+        """
+        Initialize new HashMap that uses separate chaining for collision
+        resolution. _buckets[i] is None while bucket i is empty, otherwise
+        a list holding the hash, key and value of each entry in turn.
+        grow_load and shrink_load work as in hash_map_sc.HashMap.
+        """
+        if grow_load is not None and shrink_load is not None \
+                and shrink_load * 2 >= grow_load:
+            raise ValueError("shrink_load must be less than half of grow_load")
+        capacity = max(capacity, 1)
+        self._buckets = [None] * capacity
+
+        self._capacity = capacity
+        self._hash_function = function
+        self._size = 0
+        self._grow_load = grow_load
+        self._shrink_load = shrink_load
+        self._min_capacity = capacity
+        # number of non-empty buckets
+        self._occupied = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output.
+        """
+        out = ''
+        for i, bucket in enumerate(self._buckets):
+            entries = []
+            if bucket is not None:
+                for j in range(0, len(bucket), STRIDE):
+                    entries.append(f"({bucket[j + 1]}: {bucket[j + 2]})")
+            out += str(i) + ': SLL [' + ' -> '.join(entries) + ']\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, bucket: list, key: str, hash: int) -> int:
+        """
+        Returns the position of key's hash in bucket, or -1 if the key
+        is not in the bucket.
+        """
+        if bucket is not None:
+            for i in range(0, len(bucket), STRIDE):
+                if bucket[i] == hash and bucket[i + 1] == key:
+                    return i
+        return -1
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Add a key:value pair to the hash map. If the key already exists,
+        update the value to the new value.
+        """
+        hash = self._hash_function(key)
+        index = hash % self._capacity
+        bucket = self._buckets[index]
+        i = self._find(bucket, key, hash)
+        # if key in hashmap, update value
+        if i >= 0:
+            bucket[i + 2] = value
+            return
+        # if key not in hashmap, add key:value
+        if bucket is None:
+            self._buckets[index] = [hash, key, value]
+            self._occupied += 1
+        else:
+            bucket += (hash, key, value)
+        self._size += 1
+        # grow once the load passes the threshold
+        if self._grow_load is not None and self.table_load() > self._grow_load:
+            self.resize_table(self._capacity * 2)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets.
+        """
+        return self._capacity - self._occupied
+
+    def table_load(self) -> float:
+        """
+        Returns the current load factor.
+        """
+        return float(self._size/self._capacity)
+
+    def stats(self) -> dict:
+        """
+        Returns the size, capacity, occupied and empty bucket counts and
+        load factor of the hash map.
+        """
+        return {
+            'size': self._size,
+            'capacity': self._capacity,
+            'occupied_buckets': self._occupied,
+            'empty_buckets': self._capacity - self._occupied,
+            'table_load': self.table_load(),
+        }
+
+    def clear(self) -> None:
+        """
+        Clears the hash map.
+        """
+        self._buckets = [None] * self._capacity
+        self._size = 0
+        self._occupied = 0
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the hash map, moving every entry to its bucket in the new
+        table using its cached hash. A bucket whose entries all land in
+        the same new bucket is moved as a whole list.
+        """
+        if new_capacity < 1:
+            return
+        buckets = [None] * new_capacity
+        occupied = 0
+        for bucket in self._buckets:
+            if bucket is None:
+                continue
+            first = bucket[0] % new_capacity
+            # whole chain moves to one bucket, reuse the list
+            if all(bucket[i] % new_capacity == first for i in range(STRIDE, len(bucket), STRIDE)):
+                if buckets[first] is None:
+                    buckets[first] = bucket
+                    occupied += 1
+                else:
+                    buckets[first] += bucket
+                continue
+            for i in range(0, len(bucket), STRIDE):
+                index = bucket[i] % new_capacity
+                if buckets[index] is None:
+                    buckets[index] = bucket[i:i + STRIDE]
+                    occupied += 1
+                else:
+                    buckets[index] += bucket[i:i + STRIDE]
+        # set hashmap to new data
+        self._buckets = buckets
+        self._capacity = new_capacity
+        self._occupied = occupied
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with the given key.
+        """
+        hash = self._hash_function(key)
+        bucket = self._buckets[hash % self._capacity]
+        i = self._find(bucket, key, hash)
+        if i < 0:
+            return None
+        return bucket[i + 2]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns true if the key is in the hash map.
+        """
+        hash = self._hash_function(key)
+        return self._find(self._buckets[hash % self._capacity], key, hash) >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the key and its value from the hash map. The bucket's last
+        entry is moved into the removed one's place.
+        """
+        hash = self._hash_function(key)
+        index = hash % self._capacity
+        bucket = self._buckets[index]
+        i = self._find(bucket, key, hash)
+        if i < 0:
+            return
+        last = len(bucket) - STRIDE
+        if i != last:
+            bucket[i:i + STRIDE] = bucket[last:]
+        del bucket[last:]
+        # drop the emptied bucket's list
+        if not bucket:
+            self._buckets[index] = None
+            self._occupied -= 1
+        self._size -= 1
+        # shrink once the load drops under the threshold
+        if self._shrink_load is not None and self._capacity > self._min_capacity \
+                and self.table_load() < self._shrink_load:
+            self.resize_table(max(self._capacity // 2, self._min_capacity))
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Get all keys in the Hashmap and return them in a dynamic array.
+        """
+        result = DynamicArray()
+        for bucket in self._buckets:
+            if bucket is not None:
+                for i in range(1, len(bucket), STRIDE):
+                    result.append(bucket[i])
+        return result
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def _ns_per_call(method, keys: list) -> float:
+    """Returns the mean ns per call of method for each key in keys."""
+    start = time.perf_counter_ns()
+    for key in keys:
+        method(key)
+    return (time.perf_counter_ns() - start) / len(keys)
+
+
+def _measure(map_class, keys: list, misses: list, load: float) -> dict:
+    """
+    Builds a map with a fixed capacity that puts it at the given load
+    factor once keys are loaded, and returns its bytes per entry and mean
+    ns per put, per get of a present key and per get of a missing key.
+    """
+    capacity = max(int(len(keys) / load), 1)
+    tracemalloc.start()
+    # grow_load None, or the map would grow back to load 1
+    m = map_class(capacity, hash, grow_load=None)
+    for key in keys:
+        m.put(key, key)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    m = map_class(capacity, hash, grow_load=None)
+    start = time.perf_counter_ns()
+    for key in keys:
+        m.put(key, key)
+    return {
+        'bytes': memory / len(keys),
+        'put': (time.perf_counter_ns() - start) / len(keys),
+        'hit': _ns_per_call(m.get, keys),
+        'miss': _ns_per_call(m.get, misses),
+    }
+
+
+if __name__ == "__main__":
+    # python hash_map_sc_array.py [number of keys]
+    import hash_map_sc
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    keys = ['key' + str(i) for i in range(n)]
+    misses = ['miss' + str(i) for i in range(n)]
+    print(f"{n} keys, fixed capacity n / load")
+    print(f"{'load':>5} {'engine':>12} {'bytes/entry':>12} {'put ns':>8} {'hit ns':>8} {'miss ns':>8}")
+    for load in (.5, 1, 2, 4, 8):
+        for name, map_class in (("linked list", hash_map_sc.HashMap), ("array", HashMap)):
+            r = _measure(map_class, keys, misses, load)
+            print(f"{load:>5} {name:>12} {r['bytes']:>12.1f} {r['put']:>8.0f} "
+                  f"{r['hit']:>8.0f} {r['miss']:>8.0f}")
@@ -0,0 +1,414 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Hashmap sharded across worker processes so lookups can use
+#              more than one core. Each worker owns a local hash_map_oa or
+#              hash_map_sc HashMap holding the keys routed to it by their
+#              hash, and serves batches of operations sent over a Pipe.
+#              Usage: python hash_map_sharded.py [number of keys] [max shards]
+
+
+import multiprocessing
+import os
+import pickle
+import sys
+import threading
+import time
+from multiprocessing.reduction import ForkingPickler
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+
+
+_MASK_64 = (1 << 64) - 1
+# 2**64 / golden ratio, mixes the hash so shards don't share its low bits
+_MIX = 0x9E3779B97F4A7C15
+
+
+class _Error:
+    """
+    Sent back in place of the result of an operation that raised, so the
+    worker keeps serving and the parent can re-raise the exception.
+    """
+    __slots__ = ('exception',)
+
+    def __init__(self, exception: BaseException) -> None:
+        """Wrap exception, replaced by a RuntimeError if it can't be pickled."""
+        try:
+            pickle.dumps(exception)
+        except Exception:
+            exception = RuntimeError(f"{type(exception).__name__}: {exception}")
+        self.exception = exception
+
+
+def _apply(m, op: str, key: str, value: object) -> object:
+    """
+    Applies one operation to the worker's local HashMap m and returns
+    its result.
+    """
+    if op == 'get':
+        return m.get(key)
+    if op == 'put':
+        return m.put(key, value)
+    if op == 'contains_key':
+        return m.contains_key(key)
+    if op == 'remove':
+        return m.remove(key)
+    if op == 'size':
+        return m.get_size()
+    if op == 'keys':
+        keys = m.get_keys()
+        return [keys[i] for i in range(keys.length())]
+    if op == 'clear':
+        return m.clear()
+    if op == 'mode':
+        import hash_map_sc
+        mode, freq = hash_map_sc.find_mode(value)
+        return ([mode[i] for i in range(mode.length())], freq)
+    raise ValueError(f"unknown operation {op!r}")
+
+
+def _raise_errors(results: list) -> list:
+    """
+    Returns results, after re-raising the exception of the first
+    operation in it that failed in a worker.
+    """
+    for result in results:
+        if isinstance(result, _Error):
+            raise result.exception
+    return results
+
+
+def _serve(conn, engine: str, capacity: int, function) -> None:
+    """
+    Worker process loop. Receives lists of (operation, key, value) tuples,
+    applies them to a local HashMap and sends back the list of results,
+    until it receives None. An operation that raises gets an _Error as its
+    result and the rest of the batch still runs.
+    """
+    if engine == 'sc':
+        import hash_map_sc as module
+    else:
+        import hash_map_oa as module
+    m = module.HashMap(capacity, function)
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+        results = []
+        for op, key, value in batch:
+            try:
+                results.append(_apply(m, op, key, value))
+            except Exception as exception:
+                results.append(_Error(exception))
+        conn.send(results)
+    conn.close()
+
+
+class Pipeline:
+    """
+    Queues operations for a sharded HashMap and sends them as one batch
+    per shard when execute() is called.
+    """
+
+    def __init__(self, m: "HashMap") -> None:
+        """Initialize an empty pipeline for m."""
+        self._map = m
+        self._ops = []
+
+    def get(self, key: str) -> "Pipeline":
+        """Queue a get of key."""
+        self._ops.append(('get', key, None))
+        return self
+
+    def put(self, key: str, value: object) -> "Pipeline":
+        """Queue a put of key:value."""
+        self._ops.append(('put', key, value))
+        return self
+
+    def contains_key(self, key: str) -> "Pipeline":
+        """Queue a contains_key of key."""
+        self._ops.append(('contains_key', key, None))
+        return self
+
+    def remove(self, key: str) -> "Pipeline":
+        """Queue a remove of key."""
+        self._ops.append(('remove', key, None))
+        return self
+
+    def execute(self) -> list:
+        """
+        Run the queued operations and return their results in the order
+        they were queued. Operations on one key run in queue order.
+        """
+        ops, self._ops = self._ops, []
+        return self._map._run(ops)
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, shards: int = None,
+                 engine: str = 'oa') -> None:
+        """
+        Initialize new HashMap split over shards worker processes (one
+        per core by default). Each worker owns a hash_map_oa HashMap, or a
+        hash_map_sc one if engine is 'sc', starting at capacity / shards.
+        function must be picklable, such as a module level function. Keys
+        are routed to shards by function in this process, and each worker
+        hashes its own keys, so function only has to be consistent within
+        a process.
+        close() stops the workers; the map is also a context manager.
+        """
+        if engine not in ('oa', 'sc'):
+            raise ValueError("engine must be 'oa' or 'sc'")
+        shards = shards or os.cpu_count() or 1
+        self._hash_function = function
+        self._shards = shards
+        self._conns = []
+        self._workers = []
+        for _ in range(shards):
+            parent, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_serve, args=(child, engine, max(capacity // shards, 1), function),
+                daemon=True)
+            worker.start()
+            child.close()
+            self._conns.append(parent)
+            self._workers.append(worker)
+
+    def __enter__(self) -> "HashMap":
+        """Return the map for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Stop the workers at the end of a with statement."""
+        self.close()
+
+    def close(self) -> None:
+        """
+        Stop the worker processes. The map can't be used afterwards.
+        """
+        for conn, worker in zip(self._conns, self._workers):
+            if worker.is_alive():
+                conn.send(None)
+                worker.join()
+            conn.close()
+        self._conns, self._workers = [], []
+
+    def get_shards(self) -> int:
+        """
+        Return the number of shards
+        """
+        return self._shards
+
+    # ------------------------------------------------------------------ #
+
+    def _shard(self, key: str) -> int:
+        """
+        Returns the shard owning key. The hash is mixed first, otherwise
+        every key in a shard would have the same hash % shards and only
+        some of the buckets in the shard's map would be used.
+        """
+        return ((self._hash_function(key) * _MIX) & _MASK_64) % self._shards
+
+    def _run(self, ops: list) -> list:
+        """
+        Sends each shard its share of ops as one batch, then collects the
+        results and returns them in the order of ops. All batches are
+        sent before any result is read, so the shards work in parallel.
+        If an operation raised in its worker, the exception of the first
+        such one is raised once every result is in.
+        """
+        batches = [[] for _ in range(self._shards)]
+        positions = [[] for _ in range(self._shards)]
+        shard = self._shard
+        for position, op in enumerate(ops):
+            index = shard(op[1])
+            batches[index].append(op)
+            positions[index].append(position)
+        busy = [index for index in range(self._shards) if batches[index]]
+        replies = self._exchange(busy, [batches[index] for index in busy])
+        results = [None] * len(ops)
+        for index, reply in zip(busy, replies):
+            for position, result in zip(positions[index], reply):
+                results[position] = result
+        return _raise_errors(results)
+
+    def _exchange(self, shards: list, batches: list) -> list:
+        """
+        Sends batches[i] to shard shards[i] and returns their replies in
+        the same order. Every batch is pickled before any is sent, so one
+        that can't be pickled raises with no shard left holding a reply
+        that a later call would read as its own. If a send still fails,
+        the replies of the shards already sent to are read and dropped.
+        """
+        payloads = [ForkingPickler.dumps(batch) for batch in batches]
+        sent = []
+        try:
+            for index, payload in zip(shards, payloads):
+                self._conns[index].send_bytes(payload)
+                sent.append(index)
+        except BaseException:
+            for index in sent:
+                self._conns[index].recv()
+            raise
+        return [self._conns[index].recv() for index in shards]
+
+    def _broadcast(self, op: str, values: list = None) -> list:
+        """
+        Sends op to every shard, with values[i] as the value for shard i,
+        and returns the list of their results.
+        """
+        batches = [[(op, None, None if values is None else values[index])]
+                   for index in range(self._shards)]
+        replies = self._exchange(list(range(self._shards)), batches)
+        return _raise_errors([reply[0] for reply in replies])
+
+    def pipeline(self) -> Pipeline:
+        """
+        Returns a Pipeline that batches operations on this map.
+        """
+        return Pipeline(self)
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Add key:value or update value if key is in the hashmap.
+        """
+        self._run([('put', key, value)])
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a key.
+        """
+        return self._run([('get', key, None)])[0]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hashmap.
+        """
+        return self._run([('contains_key', key, None)])[0]
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its value from the hashmap.
+        """
+        self._run([('remove', key, None)])
+
+    def put_many(self, items) -> None:
+        """
+        Add every key:value pair in items, in one batch per shard.
+        """
+        self._run([('put', key, value) for key, value in items])
+
+    def get_many(self, keys) -> DynamicArray:
+        """
+        Returns a dynamic array with the value of each key in keys,
+        or None for keys not in the hashmap, fetched in one batch per shard.
+        """
+        return DynamicArray(self._run([('get', key, None) for key in keys]))
+
+    def remove_many(self, keys) -> None:
+        """
+        Removes every key in keys, in one batch per shard.
+        """
+        self._run([('remove', key, None) for key in keys])
+
+    def get_size(self) -> int:
+        """
+        Return size of map, summed over the shards
+        """
+        return sum(self._broadcast('size'))
+
+    def clear(self) -> None:
+        """
+        Clears the contents of every shard.
+        """
+        self._broadcast('clear')
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a dynamic array that contains all the keys stored in the
+        hashmap, grouped by shard.
+        """
+        result = DynamicArray()
+        for keys in self._broadcast('keys'):
+            for key in keys:
+                result.append(key)
+        return result
+
+    def find_mode(self, values) -> (DynamicArray, int):
+        """
+        Finds the most frequent value(s) in values and the frequency, like
+        hash_map_sc.find_mode, with each shard counting the values routed
+        to it. Every copy of a value goes to the same shard, so the modes
+        are those of the shards with the highest frequency. Tied values
+        are grouped by shard. The map's own contents are not used.
+        """
+        parts = [[] for _ in range(self._shards)]
+        shard = self._shard
+        for value in values:
+            parts[shard(value)].append(value)
+        mode, freq = DynamicArray(), 0
+        for shard_mode, shard_freq in self._broadcast('mode', parts):
+            if shard_freq > freq:
+                mode, freq = DynamicArray(), shard_freq
+            if shard_freq == freq:
+                for value in shard_mode:
+                    mode.append(value)
+        return (mode, freq)
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def _throughput(m, keys: list, batch: int) -> (float, float):
+    """
+    Returns the puts and gets per second of loading keys into m and
+    reading them back, batch keys per get_many/put_many call.
+    """
+    start = time.perf_counter()
+    for i in range(0, len(keys), batch):
+        m.put_many([(key, key) for key in keys[i:i + batch]])
+    puts = len(keys) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for i in range(0, len(keys), batch):
+        m.get_many(keys[i:i + batch])
+    gets = len(keys) / (time.perf_counter() - start)
+    return puts, gets
+
+
+def _check_unpicklable() -> None:
+    """
+    Regression check: a put_many holding a value that can't be pickled
+    raises, and the map still answers later calls correctly. Before the
+    batches were pickled up front, shards sent to before the failure kept
+    a reply queued and every later call read the previous one's.
+    """
+    with HashMap(16, hash_function_1, 4) as m:
+        m.put('a', 1)
+        items = [('key' + str(i), i) for i in range(32)] + [('lock', threading.Lock())]
+        try:
+            m.put_many(items)
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("unpicklable value was sent")
+        assert m.get('a') == 1 and m.get_size() == 1
+        assert m.get('key0') is None and not m.contains_key('lock')
+
+
+if __name__ == "__main__":
+    import hash_map_oa
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    max_shards = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    batch = 10_000
+    _check_unpicklable()
+    keys = ['key' + str(i) for i in range(n)]
+    print(f"{n} keys, batches of {batch}, {os.cpu_count()} cores")
+    print(f"{'shards':>14} {'puts/s':>10} {'gets/s':>10}")
+    single = hash_map_oa.HashMap(16, hash)
+    puts, gets = _throughput(single, keys, batch)
+    print(f"{'single process':>14} {puts:>10.0f} {gets:>10.0f}")
+    shards = 1
+    while shards <= max_shards:
+        with HashMap(16, hash, shards) as m:
+            puts, gets = _throughput(m, keys, batch)
+        print(f"{shards:>14} {puts:>10.0f} {gets:>10.0f}")
+        shards *= 2
@@ -0,0 +1,156 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Versioned binary snapshot format used by HashMap.save() and
+#              HashMap.load() in hash_map_sc and hash_map_oa. Every entry is
+#              stored with its cached hash (and, for OA, its slot), so a
+#              loaded map is rebuilt without calling the hash function or
+#              probing.
+#
+#              header: magic, format version, map kind, capacity, record
+#                      count, hash function fingerprint
+#              then blocks of up to block_size records, each a length and a
+#              pickled (slots, hashes, keys, values) tuple of lists. A
+#              tombstone is stored as key and value None.
+#
+#              The lists are pickled, so only load snapshots you trust.
+
+
+import mmap
+import pickle
+import struct
+
+
+_MAGIC = b'HMSN'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHBQQQ')
+_BLOCK = struct.Struct('<Q')
+# map kinds
+SC = 1
+OA = 2
+
+_MASK_64 = (1 << 64) - 1
+# key hashed to check a snapshot is loaded with the function that saved it
+_FINGERPRINT_KEY = 'hash_map_snapshot'
+
+
+def _fingerprint(function) -> int:
+    """
+    Returns function's hash of a fixed key. A different function, or
+    builtin hash() under a different seed, almost surely gives another.
+    """
+    return function(_FINGERPRINT_KEY) & _MASK_64
+
+
+def write(path: str, kind: int, capacity: int, count: int, function,
+          records, block_size: int = 1 << 16) -> None:
+    """
+    Writes a snapshot of count records to path. records yields
+    (slot, hash, key, value) tuples, with key and value None for an OA
+    tombstone; slot is None for SC. Records are written block_size at a
+    time, so only one block is held in memory.
+    """
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, kind, capacity, count,
+                                _fingerprint(function)))
+        block = ([], [], [], [])
+        for record in records:
+            for column, item in zip(block, record):
+                column.append(item)
+            if len(block[0]) == block_size:
+                _write_block(file, block)
+                block = ([], [], [], [])
+        if block[0]:
+            _write_block(file, block)
+
+
+def _write_block(file, block: tuple) -> None:
+    """
+    Writes one block of record columns.
+    """
+    data = pickle.dumps(block, protocol=pickle.HIGHEST_PROTOCOL)
+    file.write(_BLOCK.pack(len(data)))
+    file.write(data)
+
+
+def hashed_with(path: str, function) -> bool:
+    """
+    Returns True if the snapshot at path was saved with function, so its
+    stored hashes are the ones function gives.
+    """
+    with open(path, 'rb') as file:
+        header = file.read(_HEADER.size)
+    return len(header) == _HEADER.size and \
+        _HEADER.unpack(header)[5] == _fingerprint(function)
+
+
+def read(path: str, kind: int, function, stream: bool = False,
+         use_mmap: bool = False, check: bool = True) -> (int, int, object):
+    """
+    Opens the snapshot at path and returns its capacity, record count and
+    a generator of (slots, hashes, keys, values) blocks.
+    By default the whole file is read at once. With stream, it is read one
+    block at a time, and with use_mmap it is memory-mapped so each block's
+    pages are only read in when it is decoded.
+    Raises ValueError if the file isn't a snapshot of this kind of map or,
+    unless check is False, was saved with a different hash function. A
+    caller passing check False must rehash the keys itself.
+    """
+    file = open(path, 'rb')
+    header = file.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        file.close()
+        raise ValueError("not a HashMap snapshot")
+    magic, version, saved_kind, capacity, count, fingerprint = _HEADER.unpack(header)
+    if magic != _MAGIC or version != _VERSION or saved_kind != kind:
+        file.close()
+        raise ValueError("not a snapshot of this kind of HashMap")
+    if check and fingerprint != _fingerprint(function):
+        file.close()
+        raise ValueError("snapshot was saved with a different hash function")
+
+    def blocks():
+        with file:
+            if stream:
+                read_bytes = file.read
+            else:
+                if use_mmap:
+                    buf = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                    buf.seek(_HEADER.size)
+                else:
+                    buf = _Buffer(file.read())
+                read_bytes = buf.read
+            try:
+                left = count
+                while left > 0:
+                    size = read_bytes(_BLOCK.size)
+                    if len(size) < _BLOCK.size:
+                        raise ValueError("snapshot is truncated")
+                    data = read_bytes(_BLOCK.unpack(size)[0])
+                    try:
+                        block = pickle.loads(data)
+                    except (pickle.UnpicklingError, EOFError):
+                        raise ValueError("snapshot is truncated") from None
+                    left -= len(block[0])
+                    yield block
+            finally:
+                if use_mmap and not stream:
+                    buf.close()
+
+    return capacity, count, blocks()
+
+
+class _Buffer:
+    """
+    Reads consecutive slices of bytes already in memory.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        """Initialize the buffer at the start of data."""
+        self._data = memoryview(data)
+        self._offset = 0
+
+    def read(self, size: int) -> memoryview:
+        """Returns the next size bytes, or fewer at the end."""
+        start = self._offset
+        self._offset += size
+        return self._data[start:self._offset]
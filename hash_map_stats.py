@@ -0,0 +1,91 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Opt-in statistics collector for the HashMap implementations.
+#              Records, per operation type, how many slots or chain nodes each
+#              lookup examined and whether it found its key, plus every call
+#              to resize_table() with its duration.
+
+
+import copy
+
+
+class HashMapStats:
+    """
+    Collects hot-path statistics for one HashMap. Attach one with
+    HashMap.enable_stats(); while none is attached the maps only pay
+    for checking whether one is.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty collector."""
+        # op name -> {'hits', 'misses', 'probes': {probes -> count}}
+        self.ops = {}
+        # one dict per resize_table() call
+        self.resizes = []
+        self._pending = 0
+
+    def add_probes(self, count: int) -> None:
+        """Add to the probes examined by the operation being recorded."""
+        self._pending += count
+
+    def record(self, op: str, hit: bool) -> None:
+        """Finish recording one operation, using the probes added so far."""
+        stats = self.ops.get(op)
+        if stats is None:
+            stats = self.ops[op] = {'hits': 0, 'misses': 0, 'probes': {}}
+        if hit:
+            stats['hits'] += 1
+        else:
+            stats['misses'] += 1
+        probes = stats['probes']
+        probes[self._pending] = probes.get(self._pending, 0) + 1
+        self._pending = 0
+
+    def record_resize(self, old_capacity: int, new_capacity: int, size: int,
+                      seconds: float) -> None:
+        """Record one resize_table() call."""
+        self.resizes.append({
+            'old_capacity': old_capacity,
+            'new_capacity': new_capacity,
+            'size': size,
+            'seconds': seconds,
+        })
+
+    def reset(self) -> None:
+        """Discard everything recorded so far."""
+        self.ops = {}
+        self.resizes = []
+        self._pending = 0
+
+    def snapshot(self) -> dict:
+        """
+        Returns a copy of the statistics, with the hit ratio and mean and
+        longest probe count of each operation type filled in.
+        """
+        ops = {}
+        for op, stats in self.ops.items():
+            total = stats['hits'] + stats['misses']
+            probes = stats['probes']
+            ops[op] = {
+                'count': total,
+                'hits': stats['hits'],
+                'misses': stats['misses'],
+                'hit_ratio': stats['hits'] / total if total else 0.0,
+                'mean_probes': sum(p * c for p, c in probes.items()) / total if total else 0.0,
+                'max_probes': max(probes) if probes else 0,
+                'probe_histogram': dict(sorted(probes.items())),
+            }
+        return {'ops': ops, 'resizes': copy.deepcopy(self.resizes)}
+
+    def metrics(self, prefix: str = 'hashmap') -> dict:
+        """
+        Returns the statistics as a flat name -> number dict, suitable for
+        handing to a metrics pipeline.
+        """
+        result = {}
+        for op, stats in self.snapshot()['ops'].items():
+            for name in ('count', 'hits', 'misses', 'hit_ratio', 'mean_probes', 'max_probes'):
+                result[f'{prefix}_{op}_{name}'] = stats[name]
+        result[f'{prefix}_resizes'] = len(self.resizes)
+        result[f'{prefix}_resize_seconds'] = sum(r['seconds'] for r in self.resizes)
+        return result
@@ -0,0 +1,310 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Hashmap implemented using open addressing in the style of
+#              SwissTable: slots come in groups of 16, and a bytearray holds
+#              one control byte per slot, either 7 bits of the key's hash or
+#              an EMPTY/DELETED marker. A group is searched with
+#              bytearray.find() for the 7 hash bits, so keys are only
+#              compared in slots whose control byte matches. Same interface
+#              as hash_map_oa.HashMap.
+
+
+import sys
+import time
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+
+
+GROUP = 16
+# control bytes; a full slot holds 7 bits of its hash, 0 to 127
+EMPTY = 0x80
+DELETED = 0xFE
+
+_MASK_64 = (1 << 64) - 1
+# 2**64 / golden ratio. A hash is multiplied by it and folded,
+# mixed = h ^ (h >> 32), so the low bits depend on all of its bits;
+# the low 7 bits become the control byte, the rest pick the group.
+_MIX = 0x9E3779B97F4A7C15
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, max_load: float = .875) -> None:
+        """
+        Initialize new HashMap that uses SwissTable style open addressing.
+        capacity is rounded up to a power of two number of groups of
+        GROUP slots. Slot i holds _keys[i], _values[i] and the key's
+        cached hash _hashes[i], and _ctrl[i] is its control byte. The
+        table is rehashed once live entries and DELETED markers would
+        take more than max_load of it.
+        """
+        if not 0 < max_load < 1:
+            raise ValueError("max_load must be between 0 and 1")
+        self._hash_function = function
+        self._max_load = max_load
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        """
+        Set up an empty table of at least capacity slots.
+        """
+        groups = 1
+        while groups * GROUP < capacity:
+            groups *= 2
+        capacity = groups * GROUP
+        self._ctrl = bytearray([EMPTY]) * capacity
+        self._hashes = [0] * capacity
+        self._keys = [None] * capacity
+        self._values = [None] * capacity
+        self._group_mask = groups - 1
+        self._capacity = capacity
+        self._size = 0
+        self._deleted = 0
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output.
+        """
+        out = ''
+        for i in range(self._capacity):
+            if self._ctrl[i] == EMPTY:
+                slot = 'None'
+            elif self._ctrl[i] == DELETED:
+                slot = 'DELETED'
+            else:
+                slot = f"K: {self._keys[i]} V: {self._values[i]}"
+            out += str(i) + ': ' + slot + '\n'
+        return out
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._size
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._capacity
+
+    # ------------------------------------------------------------------ #
+
+    def _find(self, key: str, hash: int) -> int:
+        """
+        Returns the slot holding key, or -1 if the key is not in the map.
+        Groups are probed in triangular order, which visits every group
+        when there is a power of two of them. The search ends at the
+        first group with an EMPTY slot, since an insert would have
+        stopped there.
+        """
+        ctrl, hashes, keys = self._ctrl, self._hashes, self._keys
+        mixed = (hash * _MIX) & _MASK_64
+        mixed ^= mixed >> 32
+        h2 = mixed & 0x7F
+        mask = self._group_mask
+        group = (mixed >> 7) & mask
+        step = 0
+        while True:
+            start = group * GROUP
+            end = start + GROUP
+            index = ctrl.find(h2, start, end)
+            while index >= 0:
+                if hashes[index] == hash and keys[index] == key:
+                    return index
+                index = ctrl.find(h2, index + 1, end)
+            if ctrl.find(EMPTY, start, end) >= 0:
+                return -1
+            step += 1
+            if step > mask:
+                return -1
+            group = (group + step) & mask
+
+    def _empty_slot(self, mixed: int) -> int:
+        """
+        Returns the first EMPTY slot on the probe path of a key whose
+        mixed hash is mixed.
+        """
+        ctrl, mask = self._ctrl, self._group_mask
+        group = (mixed >> 7) & mask
+        step = 0
+        while True:
+            start = group * GROUP
+            index = ctrl.find(EMPTY, start, start + GROUP)
+            if index >= 0:
+                return index
+            step += 1
+            group = (group + step) & mask
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Add key:value or update value if key is in the hashmap. A new key
+        goes in the first EMPTY or DELETED slot on its probe path, found
+        during the same pass that looked for the key.
+        """
+        hash = self._hash_function(key)
+        ctrl, hashes, keys = self._ctrl, self._hashes, self._keys
+        mixed = (hash * _MIX) & _MASK_64
+        mixed ^= mixed >> 32
+        h2 = mixed & 0x7F
+        mask = self._group_mask
+        group = (mixed >> 7) & mask
+        step = 0
+        free = -1
+        while True:
+            start = group * GROUP
+            end = start + GROUP
+            index = ctrl.find(h2, start, end)
+            while index >= 0:
+                # update existing key:value
+                if hashes[index] == hash and keys[index] == key:
+                    self._values[index] = value
+                    return
+                index = ctrl.find(h2, index + 1, end)
+            # DELETED slots only need looking for when there are some
+            if free < 0 and self._deleted:
+                free = ctrl.find(DELETED, start, end)
+            empty = ctrl.find(EMPTY, start, end)
+            if empty >= 0:
+                if free < 0:
+                    free = empty
+                break
+            step += 1
+            if step > mask:
+                break
+            group = (group + step) & mask
+        # rehash first if the new entry would pass the load limit
+        if self._size + self._deleted + 1 > self._max_load * self._capacity:
+            if self._size + 1 > self._max_load * self._capacity / 2:
+                self.resize_table(self._capacity * 2)
+            else:
+                # mostly DELETED markers, clear them at the same size
+                self.resize_table(self._capacity)
+            free = self._empty_slot(mixed)
+        elif self._ctrl[free] == DELETED:
+            self._deleted -= 1
+        self._ctrl[free] = h2
+        self._hashes[free] = hash
+        self._keys[free] = key
+        self._values[free] = value
+        self._size += 1
+
+    def table_load(self) -> float:
+        """
+        Returns the table load factor.
+        """
+        return float(self._size/self._capacity)
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets. Buckets holding a DELETED
+        marker are not empty.
+        """
+        return self._capacity - self._size - self._deleted
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Change the capacity of the hashmap keeping all pre-existing
+        key value pairs, rounded up to whole groups and to fit under the
+        load limit. Cached hashes are reused and DELETED markers dropped.
+        """
+        # non valid new capacity
+        if new_capacity < 1 or new_capacity < self._size:
+            return
+        while self._size > self._max_load * new_capacity:
+            new_capacity *= 2
+        size = self._size
+        old = zip(self._ctrl, self._hashes, self._keys, self._values)
+        self._allocate(new_capacity)
+        ctrl, hashes, keys, values = self._ctrl, self._hashes, self._keys, self._values
+        for control, hash, key, value in old:
+            if control < EMPTY:
+                mixed = (hash * _MIX) & _MASK_64
+                mixed ^= mixed >> 32
+                index = self._empty_slot(mixed)
+                ctrl[index] = control
+                hashes[index] = hash
+                keys[index] = key
+                values[index] = value
+        self._size = size
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a key.
+        """
+        index = self._find(key, self._hash_function(key))
+        if index < 0:
+            return None
+        return self._values[index]
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hashmap.
+        """
+        return self._find(key, self._hash_function(key)) >= 0
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its value from the hashmap. The slot is
+        marked EMPTY if its group still has an EMPTY slot, since then no
+        probe ever continued past the group; otherwise DELETED.
+        """
+        index = self._find(key, self._hash_function(key))
+        if index < 0:
+            return
+        start = index - index % GROUP
+        if self._ctrl.find(EMPTY, start, start + GROUP) >= 0:
+            self._ctrl[index] = EMPTY
+        else:
+            self._ctrl[index] = DELETED
+            self._deleted += 1
+        self._keys[index] = None
+        self._values[index] = None
+        self._size -= 1
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hashmap.
+        """
+        self._allocate(self._capacity)
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a dynamic array that contains all the keys stored in the hashmap.
+        """
+        result = DynamicArray()
+        for index in range(self._capacity):
+            if self._ctrl[index] < EMPTY:
+                result.append(self._keys[index])
+        return result
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def _ns_per_call(method, keys: list) -> float:
+    """Returns the mean ns per call of method for each key in keys."""
+    start = time.perf_counter_ns()
+    for key in keys:
+        method(key)
+    return (time.perf_counter_ns() - start) / len(keys)
+
+
+if __name__ == "__main__":
+    # python hash_map_swiss.py [number of keys]
+    import hash_map_oa
+    import hash_map_oa_flat
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    keys = ['key' + str(i) for i in range(n)]
+    misses = ['miss' + str(i) for i in range(n)]
+    print(f"{n} keys, ns per operation")
+    print(f"{'map':>10} {'load':>6} {'put':>7} {'hit':>7} {'miss':>7} {'remove':>7}")
+    for name, map_class in (("quadratic", hash_map_oa.HashMap),
+                            ("flat", hash_map_oa_flat.HashMap),
+                            ("swiss", HashMap)):
+        m = map_class(16, hash)
+        put = _ns_per_call(lambda key: m.put(key, key), keys)
+        load = m.table_load()
+        hit = _ns_per_call(m.get, keys)
+        miss = _ns_per_call(m.get, misses)
+        remove = _ns_per_call(m.remove, keys)
+        print(f"{name:>10} {load:>6.2f} {put:>7.0f} {hit:>7.0f} {miss:>7.0f} {remove:>7.0f}")
@@ -0,0 +1,498 @@
+# Course: CS261 - Data Structures
+# Assignment: 6
+# Description: Durable wrapper around hash_map_sc or hash_map_oa. Every put(),
+#              remove() and clear() is appended to a write-ahead log in a
+#              directory, and the map is rebuilt from the directory when it
+#              is opened again after a restart or crash.
+#
+#              Changes are group committed: they are collected in memory and
+#              written as one frame, followed by one fsync, once
+#              commit_records of them are pending or commit_interval seconds
+#              have passed since the last commit. Once checkpoint_records
+#              changes have been logged, the map is saved as a
+#              hash_map_snapshot checkpoint and the older log segments are
+#              deleted.
+#
+#              directory: checkpoint-<n>.hms   map holding every change before
+#                                              segment n
+#                         wal-<n>.log          segment n of the log
+#              segment: magic, format version, then frames, each a length, a
+#                       CRC-32 and the change records, pickled one after
+#                       another
+#
+#              Recovery loads the newest checkpoint, rehashing its keys if it
+#              was saved under another hash function (such as builtin hash()
+#              in an earlier process), reads the segments after
+#              it, keeps only the last change to each key, and applies those
+#              with one put_many() (sized once) and one remove_many(). A frame
+#              cut short by a crash ends the log; changes in it were never
+#              acknowledged by commit().
+#
+#              Frames are pickled, so only open directories you trust.
+#              Usage: python hash_map_wal.py [number of records]
+
+
+import io
+import os
+import pickle
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+from a6_include import (DynamicArray, hash_function_1, hash_function_2)
+from hash_functions import fnv1a
+import hash_map_oa
+import hash_map_sc
+import hash_map_snapshot
+
+
+_MAGIC = b'HMWL'
+# version 1 frames held one pickled list of records
+_VERSION = 2
+_SEGMENT_HEADER = struct.Struct('<4sH')
+_FRAME = struct.Struct('<II')
+# change records, as tuples starting with one of these
+PUT = 1
+REMOVE = 2
+CLEAR = 3
+# marks a key whose last change was a remove during recovery
+_REMOVED = object()
+
+
+def _fsync_directory(directory: str) -> None:
+    """
+    Makes the creation, renaming or removal of files in directory durable.
+    """
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _numbered(directory: str, prefix: str, suffix: str) -> list:
+    """
+    Returns the numbers n of the files named prefix + n + suffix in
+    directory, in increasing order.
+    """
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith(suffix):
+            number = name[len(prefix):len(name) - len(suffix)]
+            if number.isdigit():
+                numbers.append(int(number))
+    return sorted(numbers)
+
+
+def read_segment(path: str, last: bool = False):
+    """
+    Generator over the lists of change records in the log segment at
+    path, one per frame. A frame cut short or failing its CRC ends the
+    segment: if last is True it is the tail of a crash and the file is
+    truncated there, otherwise ValueError is raised.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    header = data[:_SEGMENT_HEADER.size]
+    if len(header) < _SEGMENT_HEADER.size and last:
+        # crashed while creating the segment
+        with open(path, 'wb') as file:
+            file.write(_SEGMENT_HEADER.pack(_MAGIC, _VERSION))
+        return
+    magic, version = _SEGMENT_HEADER.unpack(header) \
+        if len(header) == _SEGMENT_HEADER.size else (None, None)
+    if magic != _MAGIC:
+        raise ValueError(f"{path} is not a HashMap log segment")
+    if version != _VERSION:
+        raise ValueError(f"{path} is a version {version} log segment, not {_VERSION}")
+    view = memoryview(data)
+    offset = _SEGMENT_HEADER.size
+    while offset < len(data):
+        end = offset + _FRAME.size
+        if end <= len(data):
+            length, crc = _FRAME.unpack_from(data, offset)
+            if end + length <= len(data) and zlib.crc32(view[end:end + length]) == crc:
+                yield _records(view[end:end + length])
+                offset = end + length
+                continue
+        if not last:
+            raise ValueError(f"{path} is corrupt at byte {offset}")
+        with open(path, 'r+b') as file:
+            file.truncate(offset)
+            os.fsync(file.fileno())
+        return
+
+
+def _records(frame) -> list:
+    """
+    Returns the list of change records pickled one after another in frame.
+    """
+    file = io.BytesIO(frame)
+    unpickler = pickle.Unpickler(file)
+    records = []
+    while file.tell() < len(frame):
+        records.append(unpickler.load())
+    return records
+
+
+class HashMap:
+    def __init__(self, capacity: int, function, directory: str, engine: str = 'sc',
+                 commit_records: int = 1024, commit_interval: float = .01,
+                 checkpoint_records: int = 1_000_000, **options) -> None:
+        """
+        Open the durable HashMap kept in directory, creating the directory
+        if needed, and recover its contents. The backing map is a
+        hash_map_sc HashMap, or a hash_map_oa one if engine is 'oa'.
+        capacity and options are passed on to its constructor; capacity
+        only matters when there is no checkpoint to load.
+        A change is durable once commit() has returned, which happens
+        automatically when commit_records changes are pending or, on the
+        next change, once commit_interval seconds have passed since the
+        last commit. commit_interval None leaves only the record count.
+        Each change is pickled before it is applied, so a value that
+        can't be pickled raises without changing the map or the log, and
+        a value changed in place afterwards is logged as it was put.
+        """
+        if engine not in ('sc', 'oa'):
+            raise ValueError("engine must be 'sc' or 'oa'")
+        self._module = hash_map_sc if engine == 'sc' else hash_map_oa
+        self._function = function
+        self._options = options
+        self._directory = directory
+        self._commit_records = commit_records
+        self._commit_interval = commit_interval
+        self._checkpoint_records = checkpoint_records
+        # pickled changes not yet written, and changes logged since the
+        # checkpoint
+        self._pending = []
+        self._logged = 0
+        os.makedirs(directory, exist_ok=True)
+        self._map = self._recover(capacity)
+        self._open_segment(self._segment)
+        self._last_commit = time.monotonic()
+
+    def _path(self, prefix: str, number: int, suffix: str) -> str:
+        """
+        Returns the path of a numbered checkpoint or segment file.
+        """
+        return os.path.join(self._directory, f"{prefix}{number:08d}{suffix}")
+
+    def _load_checkpoint(self, path: str, capacity: int):
+        """
+        Returns the map saved in the checkpoint at path. A checkpoint saved
+        with a different hash function, e.g. builtin hash() under another
+        seed, can't reuse its stored hashes, so its keys are put into a
+        new map instead.
+        """
+        if hash_map_snapshot.hashed_with(path, self._function):
+            return self._module.HashMap.load(path, self._function, **self._options)
+        kind = hash_map_snapshot.SC if self._module is hash_map_sc else hash_map_snapshot.OA
+        _, count, blocks = hash_map_snapshot.read(path, kind, self._function, check=False)
+        m = self._module.HashMap(capacity, self._function, **self._options)
+        # OA tombstones are saved with key None; size_hint sizes the table once
+        m.put_many(((key, value) for _, _, keys, values in blocks
+                    for key, value in zip(keys, values) if key is not None),
+                   size_hint=count)
+        return m
+
+    def _recover(self, capacity: int):
+        """
+        Returns the map held by the directory: its newest checkpoint plus
+        the changes in the log segments after it. Sets _segment to the
+        number of the last segment, or of the checkpoint if there is none
+        after it.
+        """
+        checkpoints = _numbered(self._directory, 'checkpoint-', '.hms')
+        start = checkpoints[-1] if checkpoints else 0
+        if checkpoints:
+            m = self._load_checkpoint(self._path('checkpoint-', start, '.hms'), capacity)
+        else:
+            m = self._module.HashMap(capacity, self._function, **self._options)
+        segments = [n for n in _numbered(self._directory, 'wal-', '.log') if n >= start]
+        # keep only the last change to each key
+        changes = {}
+        cleared = False
+        for n in segments:
+            path = self._path('wal-', n, '.log')
+            for records in read_segment(path, last=n == segments[-1]):
+                self._logged += len(records)
+                for record in records:
+                    if record[0] == PUT:
+                        changes[record[1]] = record[2]
+                    elif record[0] == REMOVE:
+                        changes[record[1]] = _REMOVED
+                    else:
+                        changes = {}
+                        cleared = True
+        if cleared:
+            m.clear()
+        removed = [key for key, value in changes.items() if value is _REMOVED]
+        # put_many() sizes the table once for all of the new keys
+        m.put_many([(key, value) for key, value in changes.items() if value is not _REMOVED])
+        m.remove_many(removed)
+        self._segment = segments[-1] if segments else start
+        return m
+
+    def _open_segment(self, number: int) -> None:
+        """
+        Starts log segment number and makes it the one appended to.
+        """
+        self._segment = number
+        self._file = open(self._path('wal-', number, '.log'), 'ab')
+        if self._file.tell() == 0:
+            self._file.write(_SEGMENT_HEADER.pack(_MAGIC, _VERSION))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            _fsync_directory(self._directory)
+
+    def _log(self, data: bytes) -> None:
+        """
+        Adds a pickled change record, committing if a window is full.
+        """
+        self._pending.append(data)
+        if len(self._pending) >= self._commit_records or (
+                self._commit_interval is not None
+                and time.monotonic() - self._last_commit >= self._commit_interval):
+            self.commit()
+
+    def commit(self) -> None:
+        """
+        Writes the pending changes as one frame and fsyncs the log, then
+        checkpoints if checkpoint_records changes have been logged.
+        """
+        self._last_commit = time.monotonic()
+        if not self._pending:
+            return
+        data = b''.join(self._pending)
+        self._file.write(_FRAME.pack(len(data), zlib.crc32(data)))
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._logged += len(self._pending)
+        self._pending = []
+        if self._logged >= self._checkpoint_records:
+            self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """
+        Saves the map as a checkpoint, starts a new log segment and
+        deletes the checkpoint and segments it replaces.
+        """
+        self.commit()
+        self._file.close()
+        number = self._segment + 1
+        path = self._path('checkpoint-', number, '.hms')
+        self._map.save(path + '.tmp')
+        fd = os.open(path + '.tmp', os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(path + '.tmp', path)
+        self._open_segment(number)
+        # everything older is now covered by the checkpoint
+        for n in _numbered(self._directory, 'checkpoint-', '.hms'):
+            if n < number:
+                os.remove(self._path('checkpoint-', n, '.hms'))
+        for n in _numbered(self._directory, 'wal-', '.log'):
+            if n < number:
+                os.remove(self._path('wal-', n, '.log'))
+        _fsync_directory(self._directory)
+        self._logged = 0
+
+    def close(self) -> None:
+        """
+        Commits the pending changes and closes the log.
+        """
+        if self._file.closed:
+            return
+        self.commit()
+        self._file.close()
+
+    def __enter__(self) -> "HashMap":
+        """Return the map for use in a with statement."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Close the map at the end of a with statement."""
+        self.close()
+
+    def __str__(self) -> str:
+        """
+        Override string method to provide more readable output
+        """
+        return str(self._map)
+
+    def get_size(self) -> int:
+        """
+        Return size of map
+        """
+        return self._map.get_size()
+
+    def get_capacity(self) -> int:
+        """
+        Return capacity of map
+        """
+        return self._map.get_capacity()
+
+    # ------------------------------------------------------------------ #
+
+    def put(self, key: str, value: object) -> None:
+        """
+        Add key:value or update value if key is in the hashmap.
+        """
+        data = pickle.dumps((PUT, key, value), protocol=pickle.HIGHEST_PROTOCOL)
+        self._map.put(key, value)
+        self._log(data)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes the given key and its value from the hashmap.
+        """
+        data = pickle.dumps((REMOVE, key), protocol=pickle.HIGHEST_PROTOCOL)
+        self._map.remove(key)
+        self._log(data)
+
+    def clear(self) -> None:
+        """
+        Clears the contents of the hashmap.
+        """
+        data = pickle.dumps((CLEAR,), protocol=pickle.HIGHEST_PROTOCOL)
+        self._map.clear()
+        self._log(data)
+
+    def get(self, key: str) -> object:
+        """
+        Returns the value associated with a key.
+        """
+        return self._map.get(key)
+
+    def contains_key(self, key: str) -> bool:
+        """
+        Returns True if the given key is in the hashmap.
+        """
+        return self._map.contains_key(key)
+
+    def resize_table(self, new_capacity: int) -> None:
+        """
+        Resizes the backing map. Not logged, as it doesn't change the
+        contents.
+        """
+        self._map.resize_table(new_capacity)
+
+    def table_load(self) -> float:
+        """
+        Returns the current load factor.
+        """
+        return self._map.table_load()
+
+    def empty_buckets(self) -> int:
+        """
+        Returns the number of empty buckets.
+        """
+        return self._map.empty_buckets()
+
+    def get_keys(self) -> DynamicArray:
+        """
+        Returns a dynamic array that contains all the keys stored in the hashmap.
+        """
+        return self._map.get_keys()
+
+
+# ------------------- BENCHMARK -------------------------------------------- #
+
+def _replay_naive(directory: str, function):
+    """
+    Rebuilds a map from a directory's log by applying every change in
+    order with put() and remove(), growing the table as it goes.
+    """
+    m = hash_map_sc.HashMap(16, function)
+    for n in _numbered(directory, 'wal-', '.log'):
+        for records in read_segment(os.path.join(directory, f"wal-{n:08d}.log")):
+            for record in records:
+                if record[0] == PUT:
+                    m.put(record[1], record[2])
+                elif record[0] == REMOVE:
+                    m.remove(record[1])
+    return m
+
+
+def _check_unpicklable() -> None:
+    """
+    Regression check: a put of a value that can't be pickled raises and
+    changes nothing, and later changes are still logged and recovered.
+    Before records were pickled in put(), the bad one stayed pending and
+    every later commit() raised, so nothing more was ever logged.
+    """
+    directory = tempfile.mkdtemp()
+    with HashMap(16, fnv1a, directory, commit_records=2) as m:
+        m.put('a', 1)
+        try:
+            m.put('b', threading.Lock())
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("unpicklable value was logged")
+        assert not m.contains_key('b')
+        m.put('c', 3)
+        m.put('d', 4)
+    with HashMap(16, fnv1a, directory) as m:
+        assert m.get_size() == 3 and m.get('d') == 4 and not m.contains_key('b')
+    shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    # python hash_map_wal.py [number of records], e.g. 10000000
+    # fnv1a, unlike builtin hash(), gives the same hashes in every process,
+    # so the checkpoint's stored hashes are reused when it is reopened
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    _check_unpicklable()
+    directory = tempfile.mkdtemp()
+
+    print("write throughput, 20000 puts")
+    print(f"{'commit_records':>15} {'puts/s':>10} {'fsyncs':>7}")
+    keys = ['key' + str(i) for i in range(20_000)]
+    for window in (1, 16, 256, 4096):
+        path = os.path.join(directory, f"window-{window}")
+        with HashMap(16, fnv1a, path, commit_records=window, commit_interval=None) as m:
+            start = time.perf_counter()
+            for i, key in enumerate(keys):
+                m.put(key, i)
+            m.commit()
+            elapsed = time.perf_counter() - start
+        print(f"{window:>15} {len(keys) / elapsed:>10.0f} {-(-len(keys) // window):>7}")
+        shutil.rmtree(path)
+
+    # n changes, a tenth of them removes, across n // 2 keys
+    path = os.path.join(directory, 'recovery')
+    with HashMap(16, fnv1a, path, commit_records=4096, commit_interval=None,
+                 checkpoint_records=n + 1) as m:
+        for i in range(n):
+            key = 'key' + str(i % (n // 2))
+            if i % 10 == 9:
+                m.remove(key)
+            else:
+                m.put(key, i)
+        size = m.get_size()
+    print(f"\nrecovery from {n} log records ({os.path.getsize(os.path.join(path, 'wal-00000000.log')) / 1e6:.0f} MB)")
+    start = time.perf_counter()
+    m = _replay_naive(path, fnv1a)
+    naive = time.perf_counter() - start
+    assert m.get_size() == size
+    start = time.perf_counter()
+    m = HashMap(16, fnv1a, path)
+    recovered = time.perf_counter() - start
+    assert m.get_size() == size
+    print(f"  put/remove each record in order: {naive:6.2f} s")
+    print(f"  last change per key, presized:   {recovered:6.2f} s")
+    m.checkpoint()
+    m.close()
+    start = time.perf_counter()
+    m = HashMap(16, fnv1a, path)
+    print(f"  from a checkpoint:               {time.perf_counter() - start:6.2f} s")
+    m.close()
+    shutil.rmtree(directory)